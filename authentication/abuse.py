@@ -0,0 +1,93 @@
+"""
+Signup abuse detection from cache-backed sliding-window counters, so a
+registration costs a couple of cache calls instead of a scan of the User
+table. Works with any Django cache; with several processes, point
+ABUSE_CACHE at a shared one (file-based or Redis) so they see each
+other's counts.
+"""
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+
+class SlidingWindowCounter:
+    """
+    Approximate count of hits in the last `window` seconds per key, from two
+    fixed buckets: all of the current one plus the part of the previous one
+    still inside the window.
+    """
+
+    def __init__(self, name, window, cache_alias=None):
+        self.name = name
+        self.window = window
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias or getattr(settings, "ABUSE_CACHE", "default")]
+
+    def _keys(self, key, now):
+        bucket = int(now // self.window)
+        return f"abuse:{self.name}:{key}:{bucket}", f"abuse:{self.name}:{key}:{bucket - 1}"
+
+    def _estimate(self, current, previous, now):
+        elapsed = (now % self.window) / self.window
+        return current + previous * (1 - elapsed)
+
+    def hit(self, key):
+        """Record one hit for `key` and return the windowed count including it."""
+        now = time.time()
+        current_key, previous_key = self._keys(key, now)
+        cache = self.cache
+        # Buckets live for two windows: one as current, one as previous
+        cache.add(current_key, 0, timeout=self.window * 2)
+        try:
+            current = cache.incr(current_key)
+            # BaseCache.incr() (file, database caches) re-sets the key with
+            # the default timeout, which can be shorter than two windows
+            cache.touch(current_key, timeout=self.window * 2)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(current_key, 1, timeout=self.window * 2)
+            current = 1
+        return self._estimate(current, cache.get(previous_key, 0), now)
+
+    def count(self, key):
+        now = time.time()
+        current_key, previous_key = self._keys(key, now)
+        values = self.cache.get_many([current_key, previous_key])
+        return self._estimate(values.get(current_key, 0), values.get(previous_key, 0), now)
+
+
+# Defaults keep the old rule: a third signup from one IP within two minutes
+DEFAULT_LIMITS = {
+    "signup_ip": {"window": 120, "limit": 3},
+    "signup_email_domain": {"window": 600, "limit": 20},
+}
+
+
+def _limits():
+    return {**DEFAULT_LIMITS, **getattr(settings, "ABUSE_LIMITS", {})}
+
+
+def check_signup(client_ip, email):
+    """
+    Count this signup against its IP and email domain. Returns
+    (is_suspicious, block_ip): a burst from one IP blocks that IP; a burst on
+    one email domain only flags the account, since many people share it.
+    """
+    limits = _limits()
+    block_ip = False
+    is_suspicious = False
+
+    if client_ip:
+        rule = limits["signup_ip"]
+        if SlidingWindowCounter("signup_ip", rule["window"]).hit(client_ip) >= rule["limit"]:
+            is_suspicious = block_ip = True
+
+    domain = email.rpartition("@")[2].lower() if email and "@" in email else ""
+    if domain:
+        rule = limits["signup_email_domain"]
+        if SlidingWindowCounter("signup_email_domain", rule["window"]).hit(domain) >= rule["limit"]:
+            is_suspicious = True
+
+    return is_suspicious, block_ip
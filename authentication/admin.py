@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Mailbox, AddressBook, GlobalAddress, User, Banner,BlockedIP, BrandLogo
+from .models import Mailbox, AddressBook, GlobalAddress, User, Banner,BlockedIP, BrandLogo, BackgroundJob, OutboundEmail, MailboxSummary, IdempotencyRecord
 
 
 @admin.register(User)
@@ -32,5 +32,28 @@ class AddressBookAdmin(admin.ModelAdmin):
 
 @admin.register(BlockedIP)
 class BlockedIPAdmin(admin.ModelAdmin):
-    list_display = ("ip_address","reason")
-    search_fields = ("ip_address","blocked_at")
\ No newline at end of file
+    list_display = ("ip_address", "prefix_length", "reason")
+    search_fields = ("ip_address","blocked_at")
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "reference", "status", "attempts", "run_after", "updated_at")
+    list_filter = ("kind", "status")
+    search_fields = ("reference",)
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject",)
+
+@admin.register(MailboxSummary)
+class MailboxSummaryAdmin(admin.ModelAdmin):
+    list_display = ("user", "item_count", "total_value", "total_shipping", "total_chargeable_weight", "updated_at")
+    search_fields = ("user__username", "user__email")
+
+@admin.register(IdempotencyRecord)
+class IdempotencyRecordAdmin(admin.ModelAdmin):
+    list_display = ("scope", "key", "user", "status", "response_status", "created_at")
+    list_filter = ("status",)
+    search_fields = ("scope", "key")
@@ -0,0 +1,95 @@
+"""
+In-process index of BlockedIP rows for the middleware. Lookups walk a binary
+prefix trie (at most 32/128 steps) instead of querying the database; the
+index is rebuilt when the table's version changes.
+"""
+import ipaddress
+import threading
+import time
+from django.conf import settings
+from django.db.models import Count, Max
+from authentication.models import BlockedIP
+
+
+class PrefixTrie:
+    """Binary trie over address bits; a node that ends a network stores its value."""
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.root = [None, None, None]  # [zero child, one child, value]
+        self.size = 0
+
+    def insert(self, network, value):
+        node = self.root
+        address = int(network.network_address)
+        for i in range(network.prefixlen):
+            bit = (address >> (self.bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            self.size += 1
+        node[2] = value
+
+    def lookup(self, address):
+        """Value of the shortest stored network containing `address`, or None."""
+        node = self.root
+        address = int(address)
+        for i in range(self.bits):
+            if node[2] is not None:
+                return node[2]
+            node = node[(address >> (self.bits - 1 - i)) & 1]
+            if node is None:
+                return None
+        return node[2]
+
+
+def blocklist_version():
+    # Count + last edit + last id catches adds, edits and deletes
+    return tuple(BlockedIP.objects.aggregate(count=Count("id"), updated=Max("updated_at"), last_id=Max("id")).values())
+
+
+class BlocklistIndex:
+    def __init__(self, recheck_after=5):
+        self.recheck_after = recheck_after
+        self.version = None
+        self.checked_at = 0.0
+        self.tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self.checked_at = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self.checked_at < self.recheck_after:
+            return
+        with self._lock:
+            if now - self.checked_at < self.recheck_after:
+                return
+            version = blocklist_version()
+            if version != self.version:
+                tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+                for row in BlockedIP.objects.only("ip_address", "prefix_length", "reason"):
+                    try:
+                        network = row.network
+                    except ValueError:
+                        continue  # bad prefix saved around clean(); ignore rather than fail every request
+                    tries[network.version].insert(network, row.reason or "blocked")
+                self.tries = tries  # swapped whole, so readers never see a half-built index
+                self.version = version
+            self.checked_at = time.monotonic()
+
+    def lookup(self, ip):
+        """The block reason if `ip` falls in a blocked address or range, else None."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        self._refresh()
+        return self.tries[address.version].lookup(address)
+
+
+blocklist = BlocklistIndex(recheck_after=getattr(settings, "BLOCKLIST_RECHECK_SECONDS", 5))
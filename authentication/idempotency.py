@@ -0,0 +1,85 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+from authentication.models import IdempotencyRecord
+
+# An in-progress record this old belongs to a worker that died mid-request
+STALE_AFTER = timedelta(minutes=2)
+KEY_HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def begin(request, scope, fingerprint_data):
+    """
+    Claim (scope, Idempotency-Key) for this request. Returns (record, None)
+    when the caller should run the request, or (None, response) to send back
+    as-is: the stored result, a 409 while the first attempt is still running,
+    or a 422 if the key was reused for a different request.
+    """
+    key = request.headers.get(KEY_HEADER, "")[:255]
+    fingerprint = request_fingerprint(fingerprint_data)
+
+    # A retry that lost its key (or never sent one) still matches a finished request
+    done = IdempotencyRecord.objects.filter(
+        scope=scope, user=request.user, request_hash=fingerprint, status="completed"
+    ).first()
+    if done is not None:
+        return None, _replay(done)
+
+    try:
+        with transaction.atomic():
+            record = IdempotencyRecord.objects.create(
+                user=request.user, scope=scope, key=key, request_hash=fingerprint
+            )
+        return record, None
+    except IntegrityError:
+        pass
+
+    record = IdempotencyRecord.objects.filter(scope=scope, key=key).first()
+    if record is None:
+        # Deleted after a failed attempt between our INSERT and SELECT: let the client retry
+        return None, Response({"detail": "Request is being retried, try again."}, status=409)
+    if record.user_id != request.user.id or record.request_hash != fingerprint:
+        return None, Response({"detail": f"{KEY_HEADER} was already used for a different request."}, status=422)
+    if record.status == "completed":
+        return None, _replay(record)
+
+    # Still running; take over only if its owner looks dead
+    taken = IdempotencyRecord.objects.filter(
+        pk=record.pk, status="in_progress", updated_at__lt=timezone.now() - STALE_AFTER
+    ).update(updated_at=timezone.now())
+    if taken:
+        return record, None
+    response = Response({"detail": "This request is already being processed."}, status=409)
+    response["Retry-After"] = "2"
+    return None, response
+
+
+def finish(record, response):
+    """
+    Store a final (non-5xx) response for replay. Server errors drop the
+    record so the client can retry with the same key.
+    """
+    if response.status_code >= 500:
+        record.delete()
+        return
+    record.status = "completed"
+    record.response_status = response.status_code
+    record.response_body = response.data
+    record.save(update_fields=["status", "response_status", "response_body", "updated_at"])
+
+
+def abandon(record):
+    record.delete()
@@ -0,0 +1,111 @@
+import logging
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from authentication.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# A job still "running" after this long belongs to a worker that died
+STALE_AFTER = timedelta(minutes=15)
+REQUEUE_INTERVAL = 60  # seconds between stale-job sweeps in a running worker
+RETRY_BASE_DELAY = 30  # seconds, doubled per attempt
+
+
+def job_handler(kind):
+    """Register `func(payload) -> result` as the handler for jobs of `kind`."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, reference="", max_attempts=3, delay=None):
+    return BackgroundJob.objects.create(
+        kind=kind,
+        payload=payload or {},
+        reference=reference,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+
+
+def claim_next_job():
+    """
+    Atomically flip the oldest due job from queued to running. The
+    conditional UPDATE makes this safe with several workers on any backend.
+    """
+    while True:
+        job = (BackgroundJob.objects
+               .filter(status="queued", run_after__lte=timezone.now())
+               .order_by("run_after", "id")
+               .first())
+        if job is None:
+            return None
+        claimed = BackgroundJob.objects.filter(pk=job.pk, status="queued").update(
+            status="running", attempts=F("attempts") + 1, updated_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{job.kind}'.")
+        job.result = handler(job.payload)
+        job.status = "done"
+        job.last_error = ""
+    except Exception:
+        job.last_error = traceback.format_exc()
+        logger.error("Job %s failed (attempt %s):\n%s", job, job.attempts, job.last_error)
+        if job.attempts < job.max_attempts and handler is not None:
+            job.status = "queued"
+            job.run_after = timezone.now() + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = "failed"
+    job.save(update_fields=["status", "result", "last_error", "run_after", "updated_at"])
+    if job.status == "failed":
+        notify_admins(job)
+    return job
+
+
+def notify_admins(job):
+    """Queue an email to settings.ADMINS about a job that gave up."""
+    recipients = [email for _, email in settings.ADMINS]
+    if not recipients:
+        return
+    from authentication.mail_queue import queue_email
+    try:
+        queue_email(
+            f"[ShipShop] Job failed: {job.kind} {job.reference}".strip(),
+            f"Job #{job.id} ({job.kind}, reference {job.reference or '-'}) failed after "
+            f"{job.attempts} attempt(s).\n\nPayload: {job.payload}\n\n{job.last_error}",
+            recipients,
+        )
+    except Exception:
+        logger.exception("Could not queue the failure alert for job %s", job)
+
+
+def requeue_stale_jobs():
+    return BackgroundJob.objects.filter(
+        status="running", updated_at__lt=timezone.now() - STALE_AFTER
+    ).update(status="queued", updated_at=timezone.now())
+
+
+def run_pending_jobs(limit=None):
+    """Run due jobs until the queue is empty (or `limit` jobs ran)."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
@@ -0,0 +1,151 @@
+import logging
+import smtplib
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+from authentication.models import OutboundEmail
+from authentication.storage import release_files
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 30  # seconds, doubled per attempt
+# An email still "sending" after this long was claimed by a worker that died
+STALE_AFTER = timedelta(minutes=15)
+# Retrying won't help: the message, its recipients or our credentials are rejected.
+# These all subclass OSError, so they must be checked before TRANSIENT_ERRORS.
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                    smtplib.SMTPAuthenticationError, smtplib.SMTPNotSupportedError,
+                    FileNotFoundError)
+# Worth retrying: the server or network hiccuped, not the message itself
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                    smtplib.SMTPHeloError, smtplib.SMTPDataError, OSError)
+
+
+def is_transient(error):
+    if isinstance(error, PERMANENT_ERRORS):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code < 500  # 4xx asks us to try again later, 5xx is final
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def queue_email(subject, body, to, attachments=None, stored_attachments=None, from_email=None):
+    """
+    Store an email for the worker instead of talking SMTP in the request.
+
+    `attachments` are (filename, content, mimetype) tuples; their content is
+    written to storage until the mail is sent. `stored_attachments` are
+    (filename, storage_name, mimetype) tuples for files that already exist.
+    """
+    records = []
+    for filename, content, mimetype in attachments or []:
+        name = default_storage.save(f"outbox/{uuid.uuid4().hex}_{filename}", ContentFile(content))
+        records.append({"name": name, "filename": filename, "mimetype": mimetype, "temporary": True})
+    for filename, name, mimetype in stored_attachments or []:
+        records.append({"name": name, "filename": filename, "mimetype": mimetype, "temporary": False})
+
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        attachments=records,
+    )
+
+
+def _claim_batch(batch_size):
+    due = list(OutboundEmail.objects
+               .filter(status="queued", next_attempt_at__lte=timezone.now())
+               .order_by("next_attempt_at", "id")
+               .values_list("id", flat=True)[:batch_size])
+    claimed = []
+    for email_id in due:
+        # Conditional UPDATE so two workers never send the same message
+        if OutboundEmail.objects.filter(pk=email_id, status="queued").update(
+                status="sending", attempts=F("attempts") + 1, claimed_at=timezone.now()):
+            claimed.append(email_id)
+    return list(OutboundEmail.objects.filter(id__in=claimed).order_by("id"))
+
+
+def _build_message(email, connection):
+    message = EmailMessage(email.subject, email.body, email.from_email, email.to, connection=connection)
+    for attachment in email.attachments:
+        with default_storage.open(attachment["name"], "rb") as f:
+            message.attach(attachment["filename"], f.read(), attachment["mimetype"])
+    return message
+
+
+def _mark_sent(email):
+    email.status = "sent"
+    email.sent_at = timezone.now()
+    email.last_error = ""
+    email.save(update_fields=["status", "sent_at", "last_error"])
+    _release_temporary(email)
+
+
+def _release_temporary(email):
+    # Content-addressed storage may share the file with another queued email
+    release_files(attachment["name"] for attachment in email.attachments if attachment.get("temporary"))
+
+
+def _mark_failed(email, error, transient):
+    email.last_error = repr(error)
+    if transient and email.attempts < email.max_attempts:
+        email.status = "queued"
+        email.next_attempt_at = timezone.now() + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (email.attempts - 1))
+    else:
+        email.status = "failed"
+    email.save(update_fields=["status", "next_attempt_at", "last_error"])
+    logger.warning("Email #%s not sent (attempt %s, %s): %r", email.id, email.attempts, email.status, error)
+    if email.status == "failed":
+        _release_temporary(email)
+
+
+def requeue_stale_emails():
+    """
+    Put emails claimed by a worker that died mid-batch back in the queue.
+    A crash after the SMTP handoff means the message may go out twice.
+    """
+    return OutboundEmail.objects.filter(
+        status="sending", claimed_at__lt=timezone.now() - STALE_AFTER
+    ).update(status="queued", next_attempt_at=timezone.now())
+
+
+def send_queued_emails(batch_size=50):
+    """Send due emails over one SMTP connection. Returns how many were sent."""
+    emails = _claim_batch(batch_size)
+    if not emails:
+        return 0
+
+    sent = 0
+    connection = get_connection()
+    try:
+        connection.open()
+        for email in emails:
+            try:
+                _build_message(email, connection).send()
+            except Exception as e:
+                if not is_transient(e):
+                    _mark_failed(email, e, transient=False)
+                    continue
+                _mark_failed(email, e, transient=True)
+                # The connection may be dead; the next message reopens it
+                connection.close()
+                connection.open()
+            else:
+                _mark_sent(email)
+                sent += 1
+    except TRANSIENT_ERRORS as e:
+        # Could not (re)connect: retry the rest of the batch later, unless
+        # the server refused us outright (e.g. bad credentials)
+        for email in emails:
+            if email.status == "sending":
+                _mark_failed(email, e, transient=is_transient(e))
+    finally:
+        connection.close()
+    return sent
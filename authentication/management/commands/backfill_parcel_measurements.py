@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from authentication.models import Mailbox, ParcelMeasurements
+from authentication.summaries import recompute_summaries
+from shipping.models import Shipment
+
+MODELS = {
+    "mailbox": Mailbox,
+    "shipment": Shipment,
+}
+
+
+class Command(BaseCommand):
+    help = "Fill the typed weight/dimension columns from the free-text fields, in primary-key chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=[*MODELS, "all"], default="all")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--only-missing", action="store_true",
+                            help="Skip rows whose chargeable_weight is already set.")
+
+    def handle(self, *args, **options):
+        names = list(MODELS) if options["model"] == "all" else [options["model"]]
+        for name in names:
+            self.backfill(MODELS[name], options["chunk_size"], options["only_missing"])
+
+    def backfill(self, model, chunk_size, only_missing):
+        columns = ["id", "weight", "dimension", "chargeable_weight"]
+        if model is Mailbox:
+            columns.append("user_id")
+        queryset = model.objects.only(*columns).order_by("pk")
+        has_updated_at = any(field.name == "updated_at" for field in model._meta.get_fields())
+        if only_missing:
+            queryset = queryset.filter(chargeable_weight__isnull=True)
+
+        last_pk = 0
+        done = 0
+        unparsed = 0
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+            if not rows:
+                break
+            reweighed = []
+            for row in rows:
+                before = row.chargeable_weight
+                row.sync_measurements()
+                if row.chargeable_weight is None:
+                    unparsed += 1
+                if row.chargeable_weight != before:
+                    reweighed.append(row)
+            # bulk_update skips signals and auto_now: refresh the mailbox
+            # totals and the changes feed for rows whose weight moved
+            model.objects.bulk_update(rows, ParcelMeasurements.MEASUREMENT_FIELDS)
+            if reweighed and model is Mailbox:
+                recompute_summaries({row.user_id for row in reweighed})
+            if reweighed and has_updated_at:
+                model.objects.filter(pk__in=[row.pk for row in reweighed]).update(updated_at=timezone.now())
+            last_pk = rows[-1].pk
+            done += len(rows)
+            self.stdout.write(f"{model.__name__}: {done} rows backfilled (last id {last_pk})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{model.__name__}: finished, {done} rows, {unparsed} with unparsable weight/dimension."
+        ))
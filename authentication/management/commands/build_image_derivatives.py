@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from authentication.models import Mailbox
+from authentication.utils.images import queue_image_derivatives
+from shipping.models import Shipment
+
+MODELS = {
+    "mailbox": Mailbox,
+    "shipment": Shipment,
+}
+
+
+class Command(BaseCommand):
+    help = "Queue thumbnail/medium derivative jobs for photos that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=[*MODELS, "all"], default="all")
+        parser.add_argument("--chunk-size", type=int, default=200, help="Rows per background job.")
+        parser.add_argument("--all", action="store_true",
+                            help="Also redo rows that have derivatives, e.g. to strip EXIF from older originals.")
+
+    def handle(self, *args, **options):
+        names = list(MODELS) if options["model"] == "all" else [options["model"]]
+        for name in names:
+            model = MODELS[name]
+            chunk_size = options["chunk_size"]
+            rows = model.objects.exclude(image="").exclude(image__isnull=True)
+            if not options["all"]:
+                rows = rows.filter(image_thumbnail="")
+            ids = list(rows.order_by("pk").values_list("pk", flat=True))
+            for start in range(0, len(ids), chunk_size):
+                queue_image_derivatives(model, ids[start:start + chunk_size])
+            self.stdout.write(self.style.SUCCESS(
+                f"{model.__name__}: queued {len(ids)} rows in {-(-len(ids) // chunk_size)} job(s)."
+            ))
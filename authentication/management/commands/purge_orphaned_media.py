@@ -0,0 +1,32 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from authentication.storage import CONTENT_ROOT, orphaned_names
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed media files that no row or pending email references, once older than an hour."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be deleted.")
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for names in self.walk_shards():
+            orphans = orphaned_names(names)
+            for name in sorted(orphans):
+                self.stdout.write(f"{'Would delete' if options['dry_run'] else 'Deleting'} {name}")
+                if not options["dry_run"]:
+                    default_storage.delete(name)
+            deleted += len(orphans)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} orphaned file(s)."))
+
+    def walk_shards(self):
+        # One reference query per leaf directory (at most 65536 of them)
+        if not default_storage.exists(CONTENT_ROOT):
+            return
+        for first in default_storage.listdir(CONTENT_ROOT)[0]:
+            for second in default_storage.listdir(f"{CONTENT_ROOT}/{first}")[0]:
+                shard = f"{CONTENT_ROOT}/{first}/{second}"
+                names = [f"{shard}/{name}" for name in default_storage.listdir(shard)[1]]
+                if names:
+                    yield names
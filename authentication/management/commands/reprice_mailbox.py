@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from authentication.models import Mailbox
+from authentication.shipping_price_calculator import get_rate_card, price_parcel, DEFAULT_RATES_FILE
+from authentication.summaries import recompute_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute Mailbox.shipping_price against the current rate card, in primary-key chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rates-file", default=DEFAULT_RATES_FILE)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--user", type=int, help="Only reprice this user's mailbox.")
+        parser.add_argument("--dry-run", action="store_true", help="Print the price changes without saving them.")
+
+    def handle(self, *args, **options):
+        try:
+            rate_card = get_rate_card(options["rates_file"])
+        except OSError as e:
+            raise CommandError(f"Cannot read rate card: {e}")
+
+        queryset = Mailbox.objects.only(
+            "id", "user_id", "weight", "dimension", "chargeable_weight", "shipping_price"
+        ).order_by("pk")
+        if options["user"]:
+            queryset = queryset.filter(user_id=options["user"])
+
+        dry_run = options["dry_run"]
+        last_pk = 0
+        scanned = changed_total = failed = 0
+
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk)[:options["chunk_size"]])
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            scanned += len(rows)
+
+            changed = []
+            for mailbox in rows:
+                try:
+                    new_price = price_parcel(mailbox, rate_card)
+                except (TypeError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f"#{mailbox.pk}: cannot price ({e}), left unchanged")
+                    continue
+                if mailbox.shipping_price != new_price:
+                    if dry_run:
+                        self.stdout.write(f"#{mailbox.pk}: {mailbox.shipping_price} -> {new_price}")
+                    mailbox.shipping_price = new_price
+                    changed.append(mailbox)
+
+            # bulk_update skips save() and the post_save pricing signal on purpose
+            if changed and not dry_run:
+                Mailbox.objects.bulk_update(changed, ["shipping_price"])
+                recompute_summaries({mailbox.user_id for mailbox in changed})
+            changed_total += len(changed)
+            self.stdout.write(f"{scanned} scanned, {changed_total} changed (last id {last_pk})")
+
+        verb = "would change" if dry_run else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {scanned} scanned, {changed_total} {verb}, {failed} could not be priced."
+        ))
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from authentication.jobs import REQUEUE_INTERVAL, requeue_stale_jobs, run_pending_jobs
+from authentication.mail_queue import requeue_stale_emails, send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs (invoices, shipments) and the outbound email queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+    def requeue_stale(self):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Re-queued {requeued} stale job(s).")
+        requeued = requeue_stale_emails()
+        if requeued:
+            self.stdout.write(f"Re-queued {requeued} stale email(s).")
+
+    def handle(self, *args, **options):
+        self.requeue_stale()
+        last_requeue = time.monotonic()
+
+        while True:
+            # Another worker may die while this one keeps running
+            if time.monotonic() - last_requeue >= REQUEUE_INTERVAL:
+                self.requeue_stale()
+                last_requeue = time.monotonic()
+            ran = run_pending_jobs()
+            if ran:
+                self.stdout.write(f"Processed {ran} job(s).")
+            sent = send_queued_emails()
+            if sent:
+                self.stdout.write(f"Sent {sent} email(s).")
+            if options["once"]:
+                break
+            if not ran and not sent:
+                time.sleep(options["sleep"])
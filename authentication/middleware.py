@@ -1,7 +1,33 @@
+import ipaddress
+from django.conf import settings
+from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
-from ipware import get_client_ip
+from authentication.blocklist import blocklist
+
+
+def resolve_client_ip(request, trusted_proxies):
+    """
+    The address the request came from. Each trusted proxy appends the address
+    it saw to X-Forwarded-For, so with N of them the client is the N-th entry
+    from the right; anything further left was sent by the client itself.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR")
+    if not trusted_proxies:
+        return remote_addr
+    forwarded = [part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if part.strip()]
+    if len(forwarded) < trusted_proxies:
+        return remote_addr  # didn't come through the proxies
+    try:
+        return str(ipaddress.ip_address(forwarded[-trusted_proxies]))
+    except ValueError:
+        return remote_addr
+
 
 class IPTrackingMiddleware(MiddlewareMixin):
     def process_request(self, request):
-        client_ip, is_routable = get_client_ip(request)
-        request.client_ip = client_ip
+        # Views (signup counters, auto-blocks, admin allow-list) use this same value
+        request.client_ip = resolve_client_ip(request, settings.TRUSTED_PROXY_COUNT)
+
+        # Answered from the in-process blocklist, before any view or query runs
+        if request.client_ip and blocklist.lookup(request.client_ip):
+            return JsonResponse({"detail": "Access from this IP address is blocked."}, status=403)
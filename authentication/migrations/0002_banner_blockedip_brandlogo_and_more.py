@@ -0,0 +1,117 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Banner',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='banners/')),
+                ('title', models.CharField(blank=True, max_length=100)),
+                ('active', models.BooleanField(default=True)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BlockedIP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.GenericIPAddressField(unique=True)),
+                ('reason', models.CharField(default='Suspicious activity', max_length=255)),
+                ('blocked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BrandLogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='brand_logos/')),
+                ('title', models.CharField(blank=True, max_length=100)),
+                ('active', models.BooleanField(default=True)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='actual_address',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='billing_address',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='date_of_birth',
+        ),
+        migrations.AddField(
+            model_name='globaladdress',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='global_addresses', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='dimension',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='invoice_pdf',
+            field=models.FileField(blank=True, null=True, upload_to='invoices/'),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='label_pdf',
+            field=models.FileField(blank=True, null=True, upload_to='labels/'),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='shipping_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='weight',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='is_suspicious',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='mailbox',
+            name='tracking_number',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.CreateModel(
+            name='AddressBook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address_line_1', models.CharField(max_length=255)),
+                ('address_line_2', models.CharField(blank=True, max_length=255, null=True)),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=100)),
+                ('zip_code', models.CharField(max_length=20)),
+                ('is_default', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='address_book', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
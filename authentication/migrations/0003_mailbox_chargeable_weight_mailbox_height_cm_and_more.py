@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_banner_blockedip_brandlogo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailbox',
+            name='chargeable_weight',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=3, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='height_cm',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='length_cm',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='weight_kg',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='width_cm',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
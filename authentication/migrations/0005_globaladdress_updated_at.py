@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='globaladdress',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
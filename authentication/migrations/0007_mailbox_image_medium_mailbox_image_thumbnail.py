@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailbox',
+            name='image_medium',
+            field=models.ImageField(blank=True, upload_to='derivatives/medium/'),
+        ),
+        migrations.AddField(
+            model_name='mailbox',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, upload_to='derivatives/thumbnails/'),
+        ),
+    ]
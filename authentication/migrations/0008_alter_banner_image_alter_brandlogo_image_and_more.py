@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_mailbox_image_medium_mailbox_image_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='banner',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to='banners/'),
+        ),
+        migrations.AlterField(
+            model_name='brandlogo',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to='brand_logos/'),
+        ),
+        migrations.AlterField(
+            model_name='mailbox',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to='mailbox_images/'),
+        ),
+        migrations.AlterField(
+            model_name='mailbox',
+            name='image_medium',
+            field=models.ImageField(blank=True, db_index=True, upload_to='derivatives/medium/'),
+        ),
+        migrations.AlterField(
+            model_name='mailbox',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, db_index=True, upload_to='derivatives/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='mailbox',
+            name='invoice_pdf',
+            field=models.FileField(blank=True, db_index=True, null=True, upload_to='invoices/'),
+        ),
+        migrations.AlterField(
+            model_name='mailbox',
+            name='label_pdf',
+            field=models.FileField(blank=True, db_index=True, null=True, upload_to='labels/'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0008_alter_banner_image_alter_brandlogo_image_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailboxSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='mailbox_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_shipping', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_chargeable_weight', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0011_blockedip_prefix_length_blockedip_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blockedip',
+            name='ip_address',
+            field=models.GenericIPAddressField(),
+        ),
+        migrations.AddConstraint(
+            model_name='blockedip',
+            constraint=models.UniqueConstraint(condition=models.Q(('prefix_length__isnull', True)), fields=('ip_address',), name='unique_blocked_address'),
+        ),
+        migrations.AddConstraint(
+            model_name='blockedip',
+            constraint=models.UniqueConstraint(fields=('ip_address', 'prefix_length'), name='unique_blocked_range'),
+        ),
+    ]
@@ -1,7 +1,12 @@
+import ipaddress
 import uuid
+from decimal import Decimal, ROUND_CEILING, ROUND_HALF_UP
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from authentication.shipping_price_calculator import parse_measurements
 
 class User(AbstractUser):
     email = models.EmailField(unique=True)
@@ -39,12 +44,42 @@ class User(AbstractUser):
         return self.username
 
 class BlockedIP(models.Model):
-    ip_address = models.GenericIPAddressField(unique=True)
+    ip_address = models.GenericIPAddressField()
+    # Blank blocks the single address; otherwise ip_address/prefix_length is a range
+    prefix_length = models.PositiveSmallIntegerField(null=True, blank=True)
     reason = models.CharField(max_length=255, default="Suspicious activity")
     blocked_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        # A range shares its network address with that single host, so both can be blocked
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ip_address"], condition=models.Q(prefix_length__isnull=True), name="unique_blocked_address"
+            ),
+            models.UniqueConstraint(fields=["ip_address", "prefix_length"], name="unique_blocked_range"),
+        ]
+
+    @property
+    def network(self):
+        address = ipaddress.ip_address(self.ip_address)
+        prefix = address.max_prefixlen if self.prefix_length is None else self.prefix_length
+        return ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+
+    def clean(self):
+        try:
+            self.network
+        except ValueError as e:
+            raise ValidationError({"prefix_length": str(e)})
+
+    def save(self, *args, **kwargs):
+        # Store ranges by their network address so 10.1.2.3/16 and 10.1.0.0/16 are one row
+        if self.prefix_length is not None:
+            self.ip_address = str(self.network.network_address)
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return self.ip_address
+        return self.ip_address if self.prefix_length is None else f"{self.ip_address}/{self.prefix_length}"
 
 class AddressBook(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='address_book')
@@ -67,24 +102,140 @@ class AddressBook(models.Model):
 
 
 
-class Mailbox(models.Model):
+def _to_decimal(value, places, rounding=ROUND_HALF_UP):
+    if value is None:
+        return None
+    return Decimal(repr(value)).quantize(Decimal(places), rounding=rounding)
+
+
+class ParcelMeasurements(models.Model):
+    """
+    Numeric copy of the free-text `weight` / `dimension` fields, refreshed on
+    every save so pricing, sorting and aggregation can run in SQL.
+    """
+    MEASUREMENT_FIELDS = ["weight_kg", "length_cm", "width_cm", "height_cm", "chargeable_weight"]
+
+    weight_kg = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True)
+    length_cm = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    width_cm = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    height_cm = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    chargeable_weight = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def sync_measurements(self):
+        weight, dims, chargeable = parse_measurements(self.weight, self.dimension)
+        self.weight_kg = _to_decimal(weight, "0.001")
+        self.length_cm, self.width_cm, self.height_cm = (
+            (_to_decimal(d, "0.01") for d in dims) if dims else (None, None, None)
+        )
+        # Round up so math.ceil() on the stored value matches the float calculation
+        self.chargeable_weight = _to_decimal(chargeable, "0.001", rounding=ROUND_CEILING)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.sync_measurements()
+        elif {"weight", "dimension"} & set(update_fields):
+            self.sync_measurements()
+            kwargs["update_fields"] = set(update_fields) | set(self.MEASUREMENT_FIELDS)
+        super().save(*args, **kwargs)
+
+
+class ParcelImageDerivatives(models.Model):
+    """
+    Thumbnail and medium renditions of `image`, built by the image_derivatives
+    job, which also re-encodes the original without its EXIF. Replacing
+    `image` clears them and queues a rebuild.
+    """
+    DERIVATIVE_FIELDS = ["image_thumbnail", "image_medium"]
+
+    image_thumbnail = models.ImageField(upload_to="derivatives/thumbnails/", blank=True, db_index=True)
+    image_medium = models.ImageField(upload_to="derivatives/medium/", blank=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "image" in field_names:  # deferred: unknown, not blank
+            loaded = instance.__dict__.get("image")
+            instance._loaded_image = getattr(loaded, "name", loaded) or ""
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if not self._state.adding and "image" in self.get_deferred_fields():
+            # Loaded without the image and never given one, so it can't have changed
+            self._image_changed = False
+            super().save(*args, **kwargs)
+            return
+
+        image_name = self.image.name or ""
+        if self._state.adding:
+            # Copies (mailbox -> shipment) arrive with their derivatives
+            self._image_changed = bool(image_name) and not self.image_thumbnail
+        else:
+            loaded = getattr(self, "_loaded_image", None)
+            if loaded is None:
+                # Loaded with image deferred, then assigned one: compare with the stored name
+                loaded = type(self)._base_manager.filter(pk=self.pk).values_list("image", flat=True).first() or ""
+            self._image_changed = (
+                loaded != image_name
+                and (update_fields is None or "image" in update_fields)
+            )
+            if self._image_changed:
+                self.image_thumbnail = self.image_medium = ""
+                if update_fields is not None:
+                    kwargs["update_fields"] = set(update_fields) | set(self.DERIVATIVE_FIELDS)
+        super().save(*args, **kwargs)
+        self._loaded_image = image_name
+
+
+class Mailbox(ParcelMeasurements, ParcelImageDerivatives):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mailbox")
     item_name = models.CharField(max_length=100)
     product_value = models.DecimalField(max_digits=10, decimal_places=2)
     tracking_number = models.CharField(max_length=50, blank=True, null=True)
-    image = models.ImageField(upload_to="mailbox_images/")
+    image = models.ImageField(upload_to="mailbox_images/", db_index=True)
     weight = models.CharField(max_length=100)
     dimension = models.CharField(max_length=100)
     shipping_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    label_pdf = models.FileField(upload_to="labels/", null=True, blank=True)
-    invoice_pdf = models.FileField(upload_to="invoices/", null=True, blank=True)
+    label_pdf = models.FileField(upload_to="labels/", null=True, blank=True, db_index=True)
+    invoice_pdf = models.FileField(upload_to="invoices/", null=True, blank=True, db_index=True)
 
+    # Columns MailboxSummary totals up; snapshotted on load so saves can apply deltas
+    SUMMARY_FIELDS = ["user_id", "product_value", "shipping_price", "chargeable_weight"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in instance.__dict__ for field in cls.SUMMARY_FIELDS):
+            instance._loaded_summary = tuple(instance.__dict__[field] for field in cls.SUMMARY_FIELDS)
+        return instance
 
     def __str__(self):
         return f"{self.item_name} ({self.user.username})"
 
 
+class MailboxSummary(models.Model):
+    """
+    Running totals of one user's mailbox, adjusted on every Mailbox save and
+    delete (see authentication.summaries) so dashboards read a single row.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="mailbox_summary")
+    item_count = models.PositiveIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_shipping = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_chargeable_weight = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.item_count} items"
+
+
 class AdminUser(AbstractUser):
     is_admin_user = models.BooleanField(default=False)
     allowed_ip = models.GenericIPAddressField(null=True, blank=True)
@@ -115,12 +266,13 @@ class GlobalAddress(models.Model):
     state = models.CharField(max_length=100)
     zip_code = models.CharField(max_length=20)
     phone = models.CharField(max_length=20)
+    updated_at = models.DateTimeField(auto_now=True, null=True)  # feeds the welcome-letter cache version
 
     def __str__(self):
         return f"{self.address_line_1}, {self.city}, {self.state}, {self.zip_code}"
 
 class Banner(models.Model):
-    image = models.ImageField(upload_to="banners/")
+    image = models.ImageField(upload_to="banners/", db_index=True)
     title = models.CharField(max_length=100, blank=True)
     active = models.BooleanField(default=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -129,10 +281,96 @@ class Banner(models.Model):
         return self.title or f"Banner {self.id}"
 
 class BrandLogo(models.Model):
-    image = models.ImageField(upload_to="brand_logos/")
+    image = models.ImageField(upload_to="brand_logos/", db_index=True)
     title = models.CharField(max_length=100, blank=True)
     active = models.BooleanField(default=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.title or f"Brand Logo {self.id}"
+
+
+JOB_STATUS_CHOICES = [
+    ("queued", "Queued"),
+    ("running", "Running"),
+    ("done", "Done"),
+    ("failed", "Failed"),
+]
+
+class BackgroundJob(models.Model):
+    """A unit of deferred work, picked up by `manage.py run_worker`."""
+    kind = models.CharField(max_length=50)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)  # e.g. PayPal payment id
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+
+EMAIL_STATUS_CHOICES = [
+    ("queued", "Queued"),
+    ("sending", "Sending"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+]
+
+class OutboundEmail(models.Model):
+    """An email waiting for the worker to send it over a shared SMTP connection."""
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    # [{"name": <storage name>, "filename": ..., "mimetype": ..., "temporary": bool}]
+    attachments = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=EMAIL_STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+IDEMPOTENCY_STATUS_CHOICES = [
+    ("in_progress", "In progress"),
+    ("completed", "Completed"),
+]
+
+class IdempotencyRecord(models.Model):
+    """
+    One client request under (scope, key). Duplicates get the stored response
+    back instead of running the request again; see authentication.idempotency.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    scope = models.CharField(max_length=255)  # e.g. "paypal-execute:<payment_id>"
+    key = models.CharField(max_length=255, blank=True)  # Idempotency-Key header
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=IDEMPOTENCY_STATUS_CHOICES, default="in_progress")
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["scope", "key"], name="unique_idempotency_scope_key")]
+
+    def __str__(self):
+        return f"{self.scope} [{self.key or '-'}] ({self.status})"
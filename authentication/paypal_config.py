@@ -1,8 +0,0 @@
-# paypal_config.py
-import paypalrestsdk
-
-paypalrestsdk.configure({
-    "mode": "live",  # or "live" when going live
-    "client_id": "AbJvo8lM1jscZvI2lxouE-RSEDoUXI8jJgRLNFBD5HLWs0iXO4SDT5OKm8ekmm2yzs7ku_ozwDtGPO3W",
-    "client_secret": "EADXsivMMFyTIl4UnFT-97jDWxj-UtflV522_1pdYONFq6pA_Dv8KlLpmkukvwAOKE1GBBX0K9GUM1Kq"
-})
@@ -0,0 +1,204 @@
+"""
+PayPal REST (v1 payments) over one pooled keep-alive session, with explicit
+timeouts and a circuit breaker so a slow PayPal can't tie up every worker.
+"""
+import logging
+import threading
+import time
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+API_BASES = {
+    "sandbox": "https://api-m.sandbox.paypal.com",
+    "live": "https://api-m.paypal.com",
+}
+
+
+class PayPalError(Exception):
+    """PayPal answered, but refused the request (4xx)."""
+
+    def __init__(self, message, status=None, details=None):
+        super().__init__(message)
+        self.status = status
+        self.details = details or {}
+
+
+class PayPalUnavailable(PayPalError):
+    """PayPal timed out, errored (5xx) or the breaker is open; safe to retry later."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_after` seconds. Then a single trial call is let through; success
+    closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_after=30):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 0
+        return max(1, int(self.reset_after - (time.monotonic() - self.opened_at)))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("PayPal circuit breaker opened after %s failures", self.failures)
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class PayPalGateway:
+    def __init__(self, base_url, client_id, client_secret, timeout=(3.05, 15), pool_size=10, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._token = None
+        self._token_expires = 0
+        self._token_lock = threading.Lock()
+
+        # Only idempotent requests are retried here; POSTs carry PayPal-Request-Id
+        # so the caller (or the client's own retry) can safely resend them.
+        retry = Retry(total=2, connect=2, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+                      allowed_methods=["GET"], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # --- payments -------------------------------------------------------
+
+    def create_payment(self, payment):
+        return self._call("POST", "/v1/payments/payment", json=payment)
+
+    def find_payment(self, payment_id):
+        return self._call("GET", f"/v1/payments/payment/{payment_id}")
+
+    def execute_payment(self, payment_id, payer_id):
+        return self._call(
+            "POST", f"/v1/payments/payment/{payment_id}/execute",
+            json={"payer_id": payer_id},
+            headers={"PayPal-Request-Id": f"execute-{payment_id}"},
+        )
+
+    # --- plumbing -------------------------------------------------------
+
+    def _access_token(self, refresh=False):
+        with self._token_lock:
+            if refresh or not self._token or time.monotonic() >= self._token_expires:
+                response = self._send("POST", "/v1/oauth2/token", auth=(self.client_id, self.client_secret),
+                                      data={"grant_type": "client_credentials"})
+                data = response.json()
+                self._token = data["access_token"]
+                # Renew a minute early so a token never expires mid-request
+                self._token_expires = time.monotonic() + int(data.get("expires_in", 300)) - 60
+            return self._token
+
+    def _call(self, method, path, headers=None, **kwargs):
+        if not self.breaker.allow():
+            raise PayPalUnavailable("PayPal is unavailable (circuit open).")
+        try:
+            for attempt in range(2):
+                auth = {"Authorization": f"Bearer {self._access_token(refresh=attempt > 0)}"}
+                response = self._send(method, path, headers={**auth, **(headers or {})}, **kwargs)
+                if response.status_code != 401:
+                    break
+            if response.status_code >= 400:
+                raise self._error(response)
+            result = response.json() if response.content else {}
+        except PayPalUnavailable:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            # A 4xx is PayPal working correctly; don't count it against the breaker
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _send(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise PayPalUnavailable(f"PayPal request failed: {e}")
+        if response.status_code >= 500:
+            raise PayPalUnavailable(f"PayPal returned HTTP {response.status_code}.", status=response.status_code)
+        if path == "/v1/oauth2/token" and response.status_code >= 400:
+            raise self._error(response)
+        return response
+
+    @staticmethod
+    def _error(response):
+        try:
+            details = response.json()
+        except ValueError:
+            details = {"body": response.text[:500]}
+        message = details.get("message") or details.get("error_description") or f"HTTP {response.status_code}"
+        return PayPalError(message, status=response.status_code, details=details)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway():
+    """The process-wide gateway built from the PAYPAL_* settings."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                breaker = getattr(settings, "PAYPAL_CIRCUIT_BREAKER", {})
+                _gateway = PayPalGateway(
+                    base_url=getattr(settings, "PAYPAL_API_BASE", None) or API_BASES[settings.PAYPAL_MODE],
+                    client_id=settings.PAYPAL_CLIENT_ID,
+                    client_secret=settings.PAYPAL_CLIENT_SECRET,
+                    timeout=getattr(settings, "PAYPAL_TIMEOUT", (3.05, 15)),
+                    pool_size=getattr(settings, "PAYPAL_POOL_SIZE", 10),
+                    breaker=CircuitBreaker(**breaker),
+                )
+    return _gateway
+
+
+def approval_url(payment):
+    for link in payment.get("links", []):
+        if link.get("rel") == "approval_url":
+            return link.get("href")
+    return None
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import *
+from .shipping_price_calculator import parse_measurements
 from django.contrib.auth.password_validation import validate_password
 import re
 
@@ -37,8 +38,8 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
     def get_is_ip_blocked(self, obj):
-        from authentication.models import BlockedIP
-        return BlockedIP.objects.filter(ip_address=obj.ip_address).exists()
+        from authentication.blocklist import blocklist
+        return bool(obj.ip_address and blocklist.lookup(obj.ip_address))
 
     def validate_email(self, value):
         return value.lower()
@@ -72,10 +73,34 @@ class BrandLogoSerializer(serializers.ModelSerializer):
 class MailboxSerializer(serializers.ModelSerializer):
     class Meta:
         model = Mailbox
-        fields = ["id", "user", "item_name", "product_value", "tracking_number", "image", "weight", "dimension", "shipping_price"]
+        fields = [
+            "id", "user", "item_name", "product_value", "tracking_number", "image", "weight", "dimension", "shipping_price",
+            "weight_kg", "length_cm", "width_cm", "height_cm", "chargeable_weight", "image_thumbnail", "image_medium"
+        ]
+        read_only_fields = [
+            "weight_kg", "length_cm", "width_cm", "height_cm", "chargeable_weight", "image_thumbnail", "image_medium"
+        ]
     class Meta:
         model = Mailbox
-        fields = ["id", "user", "item_name", "product_value", "tracking_number", "image", "weight", "dimension", "shipping_price"]
+        fields = [
+            "id", "user", "item_name", "product_value", "tracking_number", "image", "weight", "dimension", "shipping_price",
+            "weight_kg", "length_cm", "width_cm", "height_cm", "chargeable_weight", "image_thumbnail", "image_medium"
+        ]
+        read_only_fields = [
+            "weight_kg", "length_cm", "width_cm", "height_cm", "chargeable_weight", "image_thumbnail", "image_medium"
+        ]
+
+    def validate_weight(self, value):
+        weight, dims, chargeable = parse_measurements(value, None)
+        if weight is None:
+            raise serializers.ValidationError("Weight must be a non-negative number (kg).")
+        return value
+
+    def validate_dimension(self, value):
+        weight, dims, chargeable = parse_measurements(None, value)
+        if dims is None:
+            raise serializers.ValidationError("Dimension must be in LxWxH format, e.g. 30x20x10 (cm).")
+        return value
 
     def get_image(self, obj):
         request = self.context.get("request")
@@ -83,6 +108,19 @@ class MailboxSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+class MailboxIntakeItemSerializer(MailboxSerializer):
+    """One item of a bulk intake request; the view resolves user_id to a User."""
+    user_id = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Mailbox
+        fields = ["user_id", "item_name", "product_value", "tracking_number", "image", "weight", "dimension"]
+
+class MailboxSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MailboxSummary
+        fields = ["item_count", "total_value", "total_shipping", "total_chargeable_weight", "updated_at"]
+
 class AdminUserApprovalSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -1,8 +1,15 @@
 import math
 import csv
 import os
+import threading
+from array import array
+from bisect import bisect_left
 from decimal import Decimal
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RATES_FILE = os.path.join(PROJECT_ROOT, "shipping_rates.csv")
+VOLUMETRIC_DIVISOR = 5000
+
 # ✅ Dummy weight-to-price mapping
 # Later: load from file
 DUMMY_PRICE_SLAB = {
@@ -29,12 +36,162 @@ def load_price_slab(file_path=None):
             price_slab[weight_limit] = price
     return price_slab
 
+
+class RateCard:
+    """
+    Weight slabs compiled into two parallel sorted arrays so a lookup is a
+    single binary search instead of a sort + linear scan.
+    """
+
+    def __init__(self, price_slab):
+        limits = sorted(price_slab)
+        self.weights = array("d", limits)
+        self.prices = array("d", (price_slab[w] for w in limits))
+
+    def price_for(self, final_weight):
+        # First slab whose limit covers the weight; heavier parcels use the top slab.
+        index = bisect_left(self.weights, final_weight)
+        if index == len(self.weights):
+            index -= 1
+        return self.prices[index]
+
+
+_rate_cards = {}
+_rate_cards_lock = threading.Lock()
+
+def _file_stamp(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def get_rate_card(file_path=None):
+    """
+    Return the compiled RateCard for `file_path` (or the dummy slab).
+    The CSV is parsed once per process and only re-read when its
+    mtime or size changes.
+    """
+    key = file_path or None
+    stamp = _file_stamp(file_path) if file_path else None
+
+    cached = _rate_cards.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with _rate_cards_lock:
+        cached = _rate_cards.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        rate_card = RateCard(load_price_slab(file_path))
+        _rate_cards[key] = (stamp, rate_card)
+        return rate_card
+
 def get_price_for_weight(final_weight, price_slab):
-    closest = None
-    for w in sorted(price_slab.keys()):
-        if final_weight <= w:
-            closest = w
-            break
-    if closest is None:
-        closest = max(price_slab.keys())
-    return price_slab[closest]
+    if not isinstance(price_slab, RateCard):
+        price_slab = RateCard(price_slab)
+    return price_slab.price_for(final_weight)
+
+def parse_dimension(dimension):
+    dims = [float(x) for x in str(dimension).lower().replace(" ", "").split("x")]
+    return dims if len(dims) == 3 else (1, 1, 1)
+
+def volumetric_weight(length, width, height):
+    return (length * width * height) / VOLUMETRIC_DIVISOR
+
+def chargeable_weight(weight, dimension):
+    # No dimension means the weight is already final (e.g. a price-by-weight quote)
+    volumetric = volumetric_weight(*parse_dimension(dimension)) if dimension else 0
+    final_weight = max(volumetric, float(weight))
+    # "inf"/"nan" parse as floats (and huge dimensions overflow to inf), but can't be rounded to a slab
+    if not (math.isfinite(final_weight) and math.isfinite(float(weight))):
+        raise ValueError("weight and dimensions must be finite numbers")
+    return math.ceil(final_weight)  # always round up for slabs
+
+def parse_measurements(weight, dimension):
+    """
+    Parse the free-text weight ("2.5") and dimension ("LxWxH") fields into
+    floats. Returns (weight, (length, width, height), chargeable_weight);
+    any part that doesn't parse is None instead of a silent 1x1x1 default.
+    """
+    def _number(value):
+        try:
+            number = float(str(value).strip())
+        except (TypeError, ValueError):
+            return None
+        return number if math.isfinite(number) and number >= 0 else None
+
+    parsed_weight = _number(weight) if weight not in (None, "") else None
+
+    dims = None
+    if dimension:
+        parts = [_number(x) for x in str(dimension).lower().replace(" ", "").split("x")]
+        if len(parts) == 3 and None not in parts:
+            dims = tuple(parts)
+
+    chargeable = None
+    if parsed_weight is not None:
+        chargeable = max(volumetric_weight(*dims) if dims else 0, parsed_weight)
+    return parsed_weight, dims, chargeable
+
+def price_for_chargeable_weight(chargeable, rate_card):
+    if not math.isfinite(chargeable):
+        raise ValueError("weight and dimensions must be finite numbers")
+    final_weight = math.ceil(chargeable)  # always round up for slabs
+    return final_weight, Decimal(str(get_price_for_weight(final_weight, rate_card)))
+
+def quote_parcel(weight, dimension, rate_card):
+    """
+    Price one parcel. Raises ValueError/TypeError on unparsable input so
+    callers can decide how to report it.
+    """
+    return price_for_chargeable_weight(chargeable_weight(weight, dimension), rate_card)
+
+def price_parcel(parcel, rate_card):
+    """
+    Price a Mailbox/Shipment-like object, preferring its stored
+    chargeable_weight over re-parsing the free-text fields.
+    """
+    if getattr(parcel, "chargeable_weight", None) is not None:
+        final_weight, price = price_for_chargeable_weight(parcel.chargeable_weight, rate_card)
+    else:
+        final_weight, price = quote_parcel(parcel.weight, parcel.dimension, rate_card)
+    return price
+
+def calculate_shipping_price(mailbox, slab_file_path=DEFAULT_RATES_FILE):
+    try:
+        rate_card = get_rate_card(slab_file_path)
+        return price_parcel(mailbox, rate_card)  # already a Decimal for DB
+    except Exception as e:
+        print("Shipping price calculation failed:", e)
+        return Decimal("0.00")
+
+def calculate_shipping_prices(mailboxes, slab_file_path=DEFAULT_RATES_FILE):
+    """
+    Batch version of calculate_shipping_price: one rate-card lookup for the
+    whole list, same Decimal("0.00") fallback per item.
+    """
+    try:
+        rate_card = get_rate_card(slab_file_path)
+    except Exception as e:
+        print("Shipping price calculation failed:", e)
+        return [Decimal("0.00") for _ in mailboxes]
+
+    prices = []
+    for mailbox in mailboxes:
+        try:
+            prices.append(price_parcel(mailbox, rate_card))
+        except Exception as e:
+            print("Shipping price calculation failed:", e)
+            prices.append(Decimal("0.00"))
+    return prices
+
+def quote_parcels(parcels, rate_card):
+    """
+    Price a batch of (weight, dimension) pairs against one rate card.
+    Yields (final_weight, price, error) per parcel, in input order.
+    """
+    for weight, dimension in parcels:
+        try:
+            final_weight, price = quote_parcel(weight, dimension, rate_card)
+        except (TypeError, ValueError) as e:
+            yield None, None, str(e)
+        else:
+            yield final_weight, price, None
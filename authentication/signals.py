@@ -1,15 +1,57 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
 from django.dispatch import receiver
-from authentication.models import Mailbox
-from authentication.views import calculate_shipping_price  # utility file
+from authentication.blocklist import blocklist
+from authentication.models import BlockedIP, Mailbox, User
+from authentication.shipping_price_calculator import calculate_shipping_price
+from authentication.storage import file_fields, release_files
+from authentication.summaries import mailbox_deleted, mailbox_saved
+from authentication.utils.images import queue_image_derivatives
+from shipping.models import Shipment
 from decimal import Decimal
 
+@receiver(pre_save, sender=Mailbox)
+def auto_calculate_shipping_price(sender, instance, raw=False, **kwargs):
+    # Runs before the INSERT so new items are priced without a second save.
+    # New items are always priced from the rate card; a price sent with the
+    # item is not trusted (admins change prices with UpdateMailboxPriceView).
+    if raw or instance.pk is not None:
+        return
+    try:
+        shipping_price = calculate_shipping_price(instance)
+        instance.shipping_price = shipping_price or Decimal("0.00")
+    except Exception as e:
+        print(f"⚠️ Shipping price calc failed for new Mailbox item '{instance.item_name}': {e}")
+
 @receiver(post_save, sender=Mailbox)
-def auto_calculate_shipping_price(sender, instance, created, **kwargs):
-    if created and instance.shipping_price is None:
-        try:
-            shipping_price = calculate_shipping_price(instance)
-            instance.shipping_price = shipping_price or Decimal("0.00")
-            instance.save(update_fields=["shipping_price"])
-        except Exception as e:
-            print(f"⚠️ Shipping price calc failed for Mailbox #{instance.id}: {e}")
+@receiver(post_save, sender=Shipment)
+def queue_parcel_image_derivatives(sender, instance, raw=False, **kwargs):
+    # Set by ParcelImageDerivatives.save() when a new photo needs renditions
+    if raw or not getattr(instance, "_image_changed", False) or not instance.image:
+        return
+    queue_image_derivatives(sender, [instance.pk])
+
+def release_deleted_files(sender, instance, **kwargs):
+    # Also runs for mailboxes/shipments removed by a cascading User delete
+    release_files(getattr(instance, field).name for field in file_fields()[sender])
+
+for model in file_fields():
+    post_delete.connect(release_deleted_files, sender=model, dispatch_uid=f"release_files_{model._meta.label_lower}")
+
+@receiver(post_save, sender=Mailbox)
+def update_mailbox_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        mailbox_saved(instance, created)
+
+@receiver(post_delete, sender=Mailbox)
+def update_mailbox_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting the user cascades to its summary row as well; nothing to keep in step
+    if isinstance(origin, User) or getattr(origin, "model", None) is User:
+        return
+    mailbox_deleted(instance)
+
+@receiver(post_save, sender=BlockedIP)
+@receiver(post_delete, sender=BlockedIP)
+def reload_blocklist(sender, **kwargs):
+    # Other processes notice the new table version within BLOCKLIST_RECHECK_SECONDS
+    transaction.on_commit(blocklist.invalidate)
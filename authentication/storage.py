@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import timedelta
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import models, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CONTENT_ROOT = "content"
+# Files this recent are never deleted as orphans: their rows may not have committed yet
+GRACE_PERIOD = timedelta(hours=1)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload as content/<ab>/<cd>/<sha256><ext>, ignoring the
+    upload_to name. Saving bytes that are already stored writes nothing and
+    returns the existing name, so copies across models share one file.
+    Files already stored under their old flat names keep working.
+    """
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        try:
+            # Reusing a stored file marks it fresh, so a release or purge
+            # running before our row commits leaves it alone (GRACE_PERIOD)
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            pass
+        # Two writers racing on the same new content: FileSystemStorage falls
+        # back to a suffixed name for the loser, which is a harmless duplicate.
+        return super()._save(name, content)
+
+    @staticmethod
+    def content_name(name, content):
+        sha = hashlib.sha256()
+        for chunk in content.chunks():
+            sha.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+        digest = sha.hexdigest()
+        extension = os.path.splitext(name)[1].lower()[:10]
+        return f"{CONTENT_ROOT}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+_file_fields = None
+
+def file_fields():
+    """{model: [file field names]} for every installed model with uploads."""
+    global _file_fields
+    if _file_fields is None:
+        _file_fields = {}
+        for model in apps.get_models():
+            names = [f.name for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+            if names:
+                _file_fields[model] = names
+    return _file_fields
+
+
+def referenced_names(names):
+    """The subset of storage `names` still referenced by a row or a pending email."""
+    remaining = set(names)
+    found = set()
+    # One lookup per (indexed) column rather than an OR across them, which
+    # databases often answer with a table scan
+    for model, fields in file_fields().items():
+        for field in fields:
+            if not remaining:
+                return found
+            hits = set(model.objects.filter(**{f"{field}__in": remaining}).values_list(field, flat=True))
+            found |= hits
+            remaining -= hits
+
+    if not remaining:
+        return found
+    # Sent and failed emails release their temporary attachments themselves
+    OutboundEmail = apps.get_model("authentication", "OutboundEmail")
+    pending = OutboundEmail.objects.filter(status__in=["queued", "sending"]).values_list("attachments", flat=True)
+    for attachments in pending.iterator():
+        found.update(attachment["name"] for attachment in attachments if attachment["name"] in remaining)
+    return found
+
+
+def orphaned_names(names):
+    """
+    The subset of `names` that nothing references and that wasn't written or
+    reused within GRACE_PERIOD. A fresh file may belong to an upload whose
+    row hasn't committed yet; purge_orphaned_media collects it later.
+    """
+    unreferenced = set(names) - referenced_names(names)
+    cutoff = timezone.now() - GRACE_PERIOD
+    orphans = set()
+    for name in unreferenced:
+        try:
+            if default_storage.get_modified_time(name) < cutoff:
+                orphans.add(name)
+        except OSError:
+            pass  # already gone
+    return orphans
+
+
+def delete_unreferenced(names):
+    for name in orphaned_names(names):
+        try:
+            default_storage.delete(name)
+        except OSError as e:
+            logger.warning("Could not delete orphaned file %s: %s", name, e)
+
+
+_released = threading.local()
+
+def release_files(names):
+    """
+    Once the current transaction commits, delete whichever of `names` nothing
+    references any more. Reference counts come from the rows themselves, so
+    shared files (a mailbox photo reused by its shipment) survive.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+    pending = getattr(_released, "names", None)
+    if pending is None:
+        pending = _released.names = set()
+    pending.update(names)
+    transaction.on_commit(_flush_released)
+
+
+def _flush_released():
+    # The first callback after a commit checks every name released in that
+    # transaction at once; the rest find nothing left. Names left over from a
+    # rolled-back transaction are still referenced, so checking them is harmless.
+    names = getattr(_released, "names", None)
+    if names:
+        _released.names = set()
+        delete_unreferenced(names)
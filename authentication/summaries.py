@@ -0,0 +1,131 @@
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from authentication.models import Mailbox, MailboxSummary
+
+ZERO = Decimal("0")
+
+# Per-thread deltas collected inside batched(); None outside it
+_batch = threading.local()
+
+# MailboxSummary column -> aggregate over the user's Mailbox rows
+TOTALS = {
+    "item_count": Count("id"),
+    "total_value": Coalesce(Sum("product_value"), Value(ZERO)),
+    "total_shipping": Coalesce(Sum("shipping_price"), Value(ZERO)),
+    "total_chargeable_weight": Coalesce(Sum("chargeable_weight"), Value(ZERO)),
+}
+
+
+def mailbox_totals(queryset):
+    """The TOTALS aggregates for any Mailbox queryset, in one query."""
+    return queryset.aggregate(**TOTALS)
+
+
+def recompute_summaries(user_ids):
+    """Rebuild the summary rows of `user_ids` from their mailboxes; for bulk paths."""
+    user_ids = set(user_ids)
+    rows = {
+        row.pop("user_id"): row
+        for row in Mailbox.objects.filter(user_id__in=user_ids).values("user_id").annotate(**TOTALS)
+    }
+    empty = {"item_count": 0, "total_value": ZERO, "total_shipping": ZERO, "total_chargeable_weight": ZERO}
+    for user_id in user_ids:
+        MailboxSummary.objects.update_or_create(user_id=user_id, defaults=rows.get(user_id, empty))
+
+
+def _contribution(values, sign):
+    user_id, product_value, shipping_price, chargeable_weight = values
+    return user_id, {
+        "item_count": sign,
+        "total_value": sign * (product_value or ZERO),
+        "total_shipping": sign * (shipping_price or ZERO),
+        "total_chargeable_weight": sign * (chargeable_weight or ZERO),
+    }
+
+
+def _apply(user_id, delta):
+    if not any(delta.values()):
+        return
+    pending = getattr(_batch, "deltas", None)
+    if pending is not None:
+        totals = pending.setdefault(user_id, dict.fromkeys(delta, 0))
+        for column, amount in delta.items():
+            totals[column] += amount
+        return
+
+    values = {
+        "updated_at": timezone.now(),
+        **{column: F(column) + amount for column, amount in delta.items()},
+    }
+    if MailboxSummary.objects.filter(user_id=user_id).update(**values):
+        return
+    # No row yet. Start one from the mailbox as it stood before this change,
+    # then add the change; if a concurrent summary_for() or write created the
+    # row first, get_or_create returns that one and only the change is added.
+    before = mailbox_totals(Mailbox.objects.filter(user_id=user_id))
+    summary, _ = MailboxSummary.objects.get_or_create(
+        user_id=user_id, defaults={column: before[column] - amount for column, amount in delta.items()}
+    )
+    MailboxSummary.objects.filter(pk=summary.pk).update(**values)
+
+
+@contextmanager
+def batched():
+    """
+    Inside the block, collect the deltas of Mailbox saves/deletes and apply
+    them as one UPDATE per user on exit, e.g. around a queryset delete().
+    Use inside the caller's transaction so the totals commit with the rows.
+    """
+    if getattr(_batch, "deltas", None) is not None:
+        yield
+        return
+    _batch.deltas = {}
+    try:
+        yield
+        deltas = _batch.deltas
+    finally:
+        _batch.deltas = None
+    for user_id, delta in deltas.items():
+        _apply(user_id, delta)
+
+
+def _current(mailbox):
+    user_id, *amounts = (getattr(mailbox, field) for field in Mailbox.SUMMARY_FIELDS)
+    # Views may assign plain strings/floats before saving
+    return (user_id, *(None if amount is None else Decimal(str(amount)) for amount in amounts))
+
+
+def mailbox_saved(mailbox, created):
+    new = _current(mailbox)
+    old = None if created else getattr(mailbox, "_loaded_summary", None)
+    if not created and old is None:
+        # Saved from an instance we never loaded; no baseline to diff against
+        recompute_summaries([mailbox.user_id])
+    elif old is None:
+        _apply(*_contribution(new, 1))
+    elif old[0] != new[0]:
+        _apply(*_contribution(old, -1))
+        _apply(*_contribution(new, 1))
+    else:
+        _, removed = _contribution(old, -1)
+        _, added = _contribution(new, 1)
+        delta = {column: removed[column] + added[column] for column in added}
+        _apply(new[0], delta)
+    mailbox._loaded_summary = new
+
+
+def mailbox_deleted(mailbox):
+    _apply(*_contribution(getattr(mailbox, "_loaded_summary", None) or _current(mailbox), -1))
+
+
+def summary_for(user_id):
+    """The user's MailboxSummary, created from their mailbox on first use."""
+    summary = MailboxSummary.objects.filter(user_id=user_id).first()
+    if summary is None:
+        recompute_summaries([user_id])
+        summary = MailboxSummary.objects.get(user_id=user_id)
+    return summary
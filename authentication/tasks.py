@@ -0,0 +1,118 @@
+import os
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from authentication import summaries
+from authentication.jobs import job_handler
+from authentication.mail_queue import queue_email
+from authentication.models import Mailbox, ParcelMeasurements
+from authentication.storage import delete_unreferenced
+from authentication.utils.images import build_image_derivatives, queue_image_derivatives
+from authentication.utils.invoice import generate_invoice
+from authentication.utils.welcome_letter import render_welcome_letter
+from shipping.models import Shipment
+from shipping.status import log_status_changes
+
+User = get_user_model()
+
+
+@job_handler("finalise_payment")
+def finalise_payment(payload):
+    """
+    After PayPal capture: render the invoice, turn the paid mailbox items into
+    shipments and queue the invoice email, all in one transaction.
+    """
+    user = User.objects.get(pk=payload["user_id"])
+    payment_id = payload["payment_id"]
+
+    invoice_name = None
+    try:
+        with transaction.atomic():
+            # Row locks: a concurrent run for the same items waits here and then finds them gone
+            mailbox_items = list(
+                Mailbox.objects.select_for_update()
+                .filter(id__in=payload["item_ids"], user=user)
+                .order_by("id")
+            )
+            if not mailbox_items:
+                # A retry after a run that committed (e.g. the worker died before marking the job done)
+                converted = Shipment.objects.filter(user=user, payment_id=payment_id).exclude(invoice_pdf="").first()
+                if converted:
+                    return {"invoice_url": converted.invoice_pdf.url}
+                raise ValueError(f"No mailbox items left to convert for payment {payment_id}.")
+
+            items = []
+            for mailbox in mailbox_items:
+                items.append({
+                    "name": mailbox.item_name,
+                    "price": str(mailbox.shipping_price),
+                    "weight": mailbox.weight,
+                    "dimension": mailbox.dimension,
+                    "tracking_number": mailbox.tracking_number,
+                })
+
+            invoice_name = generate_invoice(user, payment_id, items)
+
+            shipments = Shipment.objects.bulk_create([
+                Shipment(
+                    user_id=mailbox.user_id,
+                    item_name=mailbox.item_name,
+                    product_value=mailbox.product_value,
+                    tracking_number=mailbox.tracking_number or "",
+                    image=mailbox.image,
+                    image_thumbnail=mailbox.image_thumbnail,
+                    image_medium=mailbox.image_medium,
+                    weight=mailbox.weight,
+                    dimension=mailbox.dimension,
+                    shipping_price=mailbox.shipping_price,
+                    invoice_pdf=invoice_name,  # one stored invoice shared by the whole order
+                    payment_id=payment_id,
+                    status="in_transit",
+                    # bulk_create skips save(), so carry the parsed measurements over
+                    **{field: getattr(mailbox, field) for field in ParcelMeasurements.MEASUREMENT_FIELDS},
+                )
+                for mailbox in mailbox_items
+            ])
+            log_status_changes([(shipment.pk, "", shipment.status) for shipment in shipments], source="checkout")
+            # bulk_create skips the post_save that queues renditions for photos still waiting on theirs
+            queue_image_derivatives(Shipment, [s.pk for s in shipments if s.image and not s.image_thumbnail])
+            with summaries.batched():  # one summary UPDATE instead of one per item
+                Mailbox.objects.filter(id__in=[mailbox.id for mailbox in mailbox_items]).delete()
+
+            queue_email(
+                "Your Payment Invoice - ShipShopGlobal",
+                f"Hi {user.username},\n\nPlease find attached your invoice for payment ID {payment_id}.",
+                [user.email],
+                stored_attachments=[(os.path.basename(invoice_name), invoice_name, "application/pdf")],
+            )
+    except Exception:
+        if invoice_name:
+            delete_unreferenced([invoice_name])  # storage writes don't roll back
+        raise
+
+    return {"invoice_url": default_storage.url(invoice_name)}
+
+
+@job_handler("send_welcome_email")
+def send_welcome_email(payload):
+    user = User.objects.get(pk=payload["user_id"])
+    pdf = render_welcome_letter(user)
+
+    subject = "Welcome to ShipShopGlobal"
+    message = f"""
+    Hi {user.first_name or user.username},
+
+    Welcome to ShipShopGlobal! Attached is your welcome letter PDF with details on how to use your shipping address.
+
+    Thank you,
+    Team ShipShopGlobal
+    """
+
+    queue_email(subject, message, [user.email],
+                attachments=[("ShipShopGlobal_Welcome.pdf", pdf, "application/pdf")])
+
+
+@job_handler("image_derivatives")
+def image_derivatives(payload):
+    return {"updated": build_image_derivatives(payload["model"], payload["ids"])}
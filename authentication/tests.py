@@ -1,3 +1,593 @@
-from django.test import TestCase
+import ipaddress
+import os
+import tempfile
+import time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from authentication import paypal_gateway, summaries
+from authentication.abuse import SlidingWindowCounter
+from authentication.blocklist import BlocklistIndex, PrefixTrie, blocklist
+from authentication.middleware import resolve_client_ip
+from authentication.models import BackgroundJob, Banner, BlockedIP, IdempotencyRecord, Mailbox, MailboxSummary, User
+from authentication.paypal_gateway import CircuitBreaker, PayPalGateway, PayPalUnavailable
+from authentication.shipping_price_calculator import RateCard, get_rate_card
+from authentication.storage import GRACE_PERIOD, orphaned_names
+from shipglobal_backend import settings as project_settings
+from shipping.fakes import FakePayPalServer
+from shipping.models import Shipment
+
+PAYMENT = {"intent": "sale", "payer": {"payment_method": "paypal"}, "transactions": []}
+
+RATES = {1: 5, 2: 8, 5: 15, 10: 25}
+
+
+class RateCardTests(TestCase):
+    def test_weights_on_a_slab_limit_use_that_slab(self):
+        rate_card = RateCard(RATES)
+        self.assertEqual(rate_card.price_for(1), 5)
+        self.assertEqual(rate_card.price_for(2), 8)
+        self.assertEqual(rate_card.price_for(10), 25)
+
+    def test_weights_between_limits_round_up_to_the_next_slab(self):
+        rate_card = RateCard(RATES)
+        self.assertEqual(rate_card.price_for(0.2), 5)
+        self.assertEqual(rate_card.price_for(1.001), 8)
+        self.assertEqual(rate_card.price_for(3), 15)
+        self.assertEqual(rate_card.price_for(9.99), 25)
+
+    def test_weights_past_the_top_slab_use_the_top_price(self):
+        self.assertEqual(RateCard(RATES).price_for(250), 25)
+
+    def test_rate_card_file_is_parsed_once_and_reloaded_when_it_changes(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w") as f:
+            f.write("1,5\n2,8\n")
+
+        rate_card = get_rate_card(path)
+        self.assertIs(get_rate_card(path), rate_card)
+
+        with open(path, "w") as f:
+            f.write("1,6\n2,9\n5,20\n")
+        reloaded = get_rate_card(path)
+        self.assertIsNot(reloaded, rate_card)
+        self.assertEqual(reloaded.price_for(3), 20)
+
+
+class ParcelMeasurementTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="measured", email="measured@example.com")
+
+    def add_item(self, weight, dimension, model=Mailbox):
+        return model.objects.create(
+            user=self.user, item_name="Parcel", product_value=10, weight=weight, dimension=dimension,
+        )
+
+    def test_save_fills_the_typed_columns(self):
+        item = self.add_item("2.5", "30 x 20 x 10")
+        self.assertEqual(item.weight_kg, Decimal("2.500"))
+        self.assertEqual((item.length_cm, item.width_cm, item.height_cm), (30, 20, 10))
+        self.assertEqual(item.chargeable_weight, Decimal("2.500"))
+
+    def test_volumetric_weight_wins_when_heavier(self):
+        item = self.add_item("1", "50x40x30")  # 60000 / 5000 = 12 kg
+        self.assertEqual(item.chargeable_weight, Decimal("12.000"))
+
+    def test_unparsable_text_leaves_the_columns_empty(self):
+        item = self.add_item("about 2kg", "big")
+        self.assertIsNone(item.weight_kg)
+        self.assertIsNone(item.length_cm)
+        self.assertIsNone(item.chargeable_weight)
+
+    def test_backfill_fills_rows_written_around_save(self):
+        item = self.add_item("2", "10x10x10")
+        shipment = self.add_item("3", "10x10x10", model=Shipment)
+        Mailbox.objects.filter(pk=item.pk).update(weight_kg=None, chargeable_weight=None)
+        Shipment.objects.filter(pk=shipment.pk).update(weight_kg=None, chargeable_weight=None)
+
+        out = StringIO()
+        call_command("backfill_parcel_measurements", "--chunk-size", "1", stdout=out)
+        item.refresh_from_db()
+        shipment.refresh_from_db()
+        self.assertEqual(item.chargeable_weight, Decimal("2.000"))
+        self.assertEqual(shipment.chargeable_weight, Decimal("3.000"))
+        self.assertIn("Mailbox: finished, 1 rows", out.getvalue())
+
+    def test_backfill_only_missing_skips_filled_rows(self):
+        filled = self.add_item("2", "10x10x10")
+        missing = self.add_item("4", "10x10x10")
+        Mailbox.objects.filter(pk=filled.pk).update(weight="5")  # stale, but has a chargeable_weight
+        Mailbox.objects.filter(pk=missing.pk).update(chargeable_weight=None)
+
+        call_command("backfill_parcel_measurements", "--model", "mailbox", "--only-missing", stdout=StringIO())
+        filled.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertEqual(filled.chargeable_weight, Decimal("2.000"))
+        self.assertEqual(missing.chargeable_weight, Decimal("4.000"))
+
+
+class MailboxPricingTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("authentication.shipping_price_calculator.get_rate_card", return_value=RateCard(RATES))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username="priced", email="priced@example.com")
+
+    def test_new_items_are_priced_from_the_rate_card(self):
+        item = Mailbox.objects.create(
+            user=self.user, item_name="Parcel", product_value=10, weight="1.5", dimension="10x10x10",
+        )
+        self.assertEqual(item.shipping_price, Decimal("8"))
+
+    def test_a_price_sent_with_a_new_item_is_ignored(self):
+        item = Mailbox.objects.create(
+            user=self.user, item_name="Parcel", product_value=10, weight="1.5", dimension="10x10x10",
+            shipping_price=Decimal("0.01"),
+        )
+        self.assertEqual(item.shipping_price, Decimal("8"))
+
+    def test_updates_keep_the_stored_price(self):
+        item = Mailbox.objects.create(
+            user=self.user, item_name="Parcel", product_value=10, weight="1.5", dimension="10x10x10",
+        )
+        item.shipping_price = Decimal("3.50")  # set by an admin
+        item.save()
+        item.refresh_from_db()
+        self.assertEqual(item.shipping_price, Decimal("3.50"))
+
+
+class RepriceMailboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="repriced", email="repriced@example.com")
+        self.other = User.objects.create(username="untouched", email="untouched@example.com")
+        self.item = self.add_item(self.user)
+        self.other_item = self.add_item(self.other)
+        Mailbox.objects.update(shipping_price=Decimal("1"))  # priced by an older rate card
+        summaries.recompute_summaries([self.user.id, self.other.id])
+
+    def add_item(self, user):
+        return Mailbox.objects.create(
+            user=user, item_name="Parcel", product_value=10, weight="1.5", dimension="10x10x10",
+        )
+
+    def reprice(self, *args):
+        out = StringIO()
+        with mock.patch(
+            "authentication.management.commands.reprice_mailbox.get_rate_card", return_value=RateCard(RATES),
+        ):
+            call_command("reprice_mailbox", "--chunk-size", "1", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def price(self, item):
+        item.refresh_from_db()
+        return item.shipping_price
+
+    def test_reprices_every_item_and_refreshes_the_summaries(self):
+        self.assertIn("2 scanned, 2 changed", self.reprice())
+        self.assertEqual(self.price(self.item), Decimal("8"))
+        self.assertEqual(self.price(self.other_item), Decimal("8"))
+        self.assertEqual(MailboxSummary.objects.get(user=self.user).total_shipping, Decimal("8"))
+
+    def test_dry_run_changes_nothing(self):
+        out = self.reprice("--dry-run")
+        self.assertIn(f"#{self.item.pk}: 1.00 -> 8", out)
+        self.assertIn("2 would change", out)
+        self.assertEqual(self.price(self.item), Decimal("1"))
+        self.assertEqual(MailboxSummary.objects.get(user=self.user).total_shipping, Decimal("1"))
+
+    def test_user_option_limits_the_rows(self):
+        self.reprice("--user", str(self.user.id))
+        self.assertEqual(self.price(self.item), Decimal("8"))
+        self.assertEqual(self.price(self.other_item), Decimal("1"))
+
+
+class MailboxSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="summary", email="summary@example.com")
+
+    def add_item(self, value):
+        return Mailbox.objects.create(
+            user=self.user, item_name="Parcel", product_value=value, weight="1", dimension="10x10x10",
+        )
+
+    def assertTotals(self, item_count, total_value):
+        summary = MailboxSummary.objects.get(user=self.user)
+        self.assertEqual(summary.item_count, item_count)
+        self.assertEqual(summary.total_value, Decimal(total_value))
+
+    def test_first_write_creates_the_row(self):
+        self.add_item(10)
+        self.assertTotals(1, "10")
+        self.add_item(5)
+        self.assertTotals(2, "15")
+
+    def test_write_after_summary_was_built_is_not_counted_twice(self):
+        self.add_item(10)
+        MailboxSummary.objects.all().delete()
+        summaries.summary_for(self.user.id)
+        self.add_item(5)
+        self.assertTotals(2, "15")
+
+    def test_batched_delete_issues_one_update(self):
+        items = [self.add_item(i + 1) for i in range(5)]
+        with self.assertNumQueries(1), summaries.batched():
+            for item in items[:3]:
+                summaries.mailbox_deleted(item)
+        self.assertTotals(2, "9")
+
+    def test_deleting_the_user_does_not_recreate_the_row(self):
+        self.add_item(10)
+        self.user.delete()
+        self.assertFalse(MailboxSummary.objects.exists())
+
+    def test_backfill_refreshes_the_totals(self):
+        item = self.add_item(10)
+        weight = MailboxSummary.objects.get(user=self.user).total_chargeable_weight
+        Mailbox.objects.filter(pk=item.pk).update(weight="", chargeable_weight=None)
+        summaries.recompute_summaries([self.user.id])
+
+        Mailbox.objects.filter(pk=item.pk).update(weight="1")
+        call_command("backfill_parcel_measurements", "--model", "mailbox", stdout=StringIO())
+        self.assertEqual(MailboxSummary.objects.get(user=self.user).total_chargeable_weight, weight)
+
+    def test_user_id_must_be_an_integer(self):
+        admin = User.objects.create(username="admin", email="admin@example.com", is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get(reverse("mailbox-summary"), {"user_id": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("authentication.paypal_gateway.time.monotonic", return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_after=30)
+
+    def test_only_consecutive_failures_open_it(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_after(), 30)
+
+    def test_half_open_admits_a_single_trial(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.return_value += 30
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())  # a concurrent caller while the trial runs
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow())
+
+
+class PayPalGatewayTests(TestCase):
+    def gateway(self, server, **breaker):
+        return PayPalGateway(server.url, "client", "secret", timeout=5, breaker=CircuitBreaker(**breaker))
+
+    def test_breaker_opens_then_lets_one_trial_through(self):
+        with FakePayPalServer(fail_next=2) as server:
+            gateway = self.gateway(server, failure_threshold=2, reset_after=0.2)
+            for _ in range(2):
+                with self.assertRaises(PayPalUnavailable):
+                    gateway.create_payment(PAYMENT)
+            self.assertEqual(gateway.breaker.state, "open")
+
+            with self.assertRaises(PayPalUnavailable):
+                gateway.create_payment(PAYMENT)
+            self.assertEqual(server.requests, 2)  # rejected without calling PayPal
+
+            time.sleep(0.25)
+            self.assertEqual(gateway.breaker.state, "half_open")
+            self.assertTrue(gateway.create_payment(PAYMENT)["id"])
+            self.assertEqual(gateway.breaker.state, "closed")
+
+    def test_failed_trial_reopens_the_breaker(self):
+        with FakePayPalServer(fail_next=2) as server:
+            gateway = self.gateway(server, failure_threshold=1, reset_after=0.2)
+            with self.assertRaises(PayPalUnavailable):
+                gateway.create_payment(PAYMENT)
+            time.sleep(0.25)
+            with self.assertRaises(PayPalUnavailable):
+                gateway.create_payment(PAYMENT)
+            self.assertEqual(gateway.breaker.state, "open")
+
+    def test_expired_token_is_refreshed_once(self):
+        with FakePayPalServer() as server:
+            gateway = self.gateway(server)
+            payment = gateway.create_payment(PAYMENT)
+            server.tokens.clear()  # PayPal revoked or expired the cached token
+            self.assertEqual(gateway.find_payment(payment["id"])["id"], payment["id"])
+
+        # token, create, find (401), token, find
+        self.assertEqual(server.requests, 5)
+        self.assertEqual(len(server.tokens), 1)
+        self.assertEqual(gateway.breaker.state, "closed")
+
+
+class PayPalViewTests(TestCase):
+    def setUp(self):
+        self.server = FakePayPalServer().start()
+        self.addCleanup(self.server.stop)
+        settings = override_settings(
+            PAYPAL_API_BASE=self.server.url,
+            PAYPAL_CIRCUIT_BREAKER={"failure_threshold": 1, "reset_after": 30},
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        paypal_gateway._gateway = None  # rebuilt from the settings above
+        self.addCleanup(setattr, paypal_gateway, "_gateway", None)
+
+        self.user = User.objects.create(username="payer", email="payer@example.com")
+        self.item = Mailbox.objects.create(
+            user=self.user, item_name="Parcel", product_value=10, shipping_price=20,
+            weight="1", dimension="10x10x10",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_checkout_returns_503_with_retry_after_while_paypal_is_down(self):
+        self.server.fail_next = 1
+        url = reverse("paypal-checkout")
+        response = self.client.post(url, {"item_ids": [self.item.id]}, format="json")
+        self.assertEqual(response.status_code, 503)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+        # The breaker is open now; PayPal isn't called again
+        response = self.client.post(url, {"item_ids": [self.item.id]}, format="json")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_execute_of_a_completed_payment_is_a_conflict(self):
+        payment = paypal_gateway.get_gateway().create_payment(PAYMENT)
+        self.server.payments[payment["id"]]["state"] = "approved"
+        response = self.client.post(
+            reverse("paypal-execute"),
+            {"payment_id": payment["id"], "payer_id": "PAYER1", "item_ids": [self.item.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["error"]["name"], "PAYMENT_ALREADY_DONE")
+
+    def execute(self, payment_id, key, item_ids=None):
+        return self.client.post(
+            reverse("paypal-execute"),
+            {"payment_id": payment_id, "payer_id": "PAYER1", "item_ids": item_ids or [self.item.id]},
+            format="json", HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retried_execute_replays_the_first_response(self):
+        payment = paypal_gateway.get_gateway().create_payment(PAYMENT)
+        first = self.execute(payment["id"], "key-1")
+        self.assertEqual(first.status_code, 202)
+        calls = self.server.requests
+
+        # Same key, and a retry that lost its key, both get the stored answer
+        for key in ("key-1", ""):
+            retry = self.execute(payment["id"], key)
+            self.assertEqual(retry.status_code, 202)
+            self.assertEqual(retry["Idempotent-Replayed"], "true")
+            self.assertEqual(retry.data, first.data)
+        self.assertEqual(self.server.requests, calls)
+        self.assertEqual(BackgroundJob.objects.filter(kind="finalise_payment").count(), 1)
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        payment = paypal_gateway.get_gateway().create_payment(PAYMENT)
+        self.execute(payment["id"], "key-1")
+        other = Mailbox.objects.create(
+            user=self.user, item_name="Other", product_value=10, weight="1", dimension="10x10x10",
+        )
+        self.assertEqual(self.execute(payment["id"], "key-1", item_ids=[other.id]).status_code, 422)
+
+    def test_server_errors_are_not_stored(self):
+        payment = paypal_gateway.get_gateway().create_payment(PAYMENT)
+        with mock.patch("authentication.views.enqueue", side_effect=RuntimeError("queue down")), \
+                self.assertLogs("authentication.views", "ERROR"):
+            self.assertEqual(self.execute(payment["id"], "key-1").status_code, 500)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+        retry = self.execute(payment["id"], "key-1")
+        self.assertEqual(retry.status_code, 202)
+        self.assertNotIn("Idempotent-Replayed", retry)
+
+
+class SlidingWindowCounterTests(TestCase):
+    def setUp(self):
+        # The cache backend production runs on, in a throwaway directory
+        backend = project_settings.CACHES["default"]["BACKEND"]
+        location = tempfile.mkdtemp(prefix="shipglobal-test-cache-")
+        settings = override_settings(CACHES={"default": {"BACKEND": backend, "LOCATION": location}})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_previous_bucket_outlives_the_default_cache_timeout(self):
+        counter = SlidingWindowCounter("test", window=600)
+        start = 600 * 2_000_000 + 10
+        with mock.patch("time.time", return_value=start):
+            for _ in range(17):
+                counter.hit("example.com")
+        # 600s later, past the cache's 300s default timeout, the bucket is
+        # the previous one and still almost fully inside the window
+        with mock.patch("time.time", return_value=start + 600):
+            self.assertAlmostEqual(counter.count("example.com"), 17 * (1 - 10 / 600))
+        with mock.patch("time.time", return_value=start + 1200):
+            self.assertEqual(counter.count("example.com"), 0)
+
+
+class PrefixTrieTests(TestCase):
+    def setUp(self):
+        self.trie = PrefixTrie(32)
+        self.trie.insert(ipaddress.ip_network("10.0.0.0/8"), "range")
+        self.trie.insert(ipaddress.ip_network("192.168.1.7/32"), "host")
+        self.trie.insert(ipaddress.ip_network("10.1.0.0/16"), "inside range")
+
+    def lookup(self, ip):
+        return self.trie.lookup(ipaddress.ip_address(ip))
+
+    def test_addresses_inside_a_network_match(self):
+        self.assertEqual(self.lookup("10.0.0.0"), "range")
+        self.assertEqual(self.lookup("10.255.255.255"), "range")
+        self.assertEqual(self.lookup("192.168.1.7"), "host")
+
+    def test_the_widest_network_wins(self):
+        self.assertEqual(self.lookup("10.1.2.3"), "range")
+
+    def test_neighbours_do_not_match(self):
+        self.assertIsNone(self.lookup("9.255.255.255"))
+        self.assertIsNone(self.lookup("11.0.0.0"))
+        self.assertIsNone(self.lookup("192.168.1.6"))
+        self.assertIsNone(self.lookup("192.168.1.8"))
+        self.assertEqual(self.trie.size, 3)
+
+
+class BlocklistIndexTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("authentication.blocklist.time.monotonic", return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = BlocklistIndex(recheck_after=5)
+
+    def block(self, ip, prefix_length=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlockedIP.objects.create(ip_address=ip, prefix_length=prefix_length, reason="abuse")
+
+    def test_ranges_hosts_and_mapped_ipv6(self):
+        self.block("203.0.113.0", 24)
+        self.block("2001:db8::", 32)
+        self.assertEqual(self.index.lookup("203.0.113.200"), "abuse")
+        self.assertEqual(self.index.lookup("::ffff:203.0.113.5"), "abuse")
+        self.assertEqual(self.index.lookup("2001:db8:1::1"), "abuse")
+        self.assertIsNone(self.index.lookup("203.0.114.1"))
+        self.assertIsNone(self.index.lookup("not-an-ip"))
+
+    def test_changes_are_picked_up_after_the_recheck_interval(self):
+        self.assertIsNone(self.index.lookup("198.51.100.1"))
+        with self.assertNumQueries(0):
+            self.index.lookup("198.51.100.1")
+
+        # Written by another process: this index only sees the row after recheck_after
+        BlockedIP.objects.create(ip_address="198.51.100.1", reason="abuse")
+        self.assertIsNone(self.index.lookup("198.51.100.1"))
+        self.clock.return_value += 5
+        self.assertEqual(self.index.lookup("198.51.100.1"), "abuse")
+
+    def test_invalidate_reloads_on_the_next_lookup(self):
+        row = self.block("198.51.100.1")
+        self.assertEqual(self.index.lookup("198.51.100.1"), "abuse")
+        row.delete()
+        self.index.invalidate()
+        self.assertIsNone(self.index.lookup("198.51.100.1"))
+
+    def test_saving_a_row_invalidates_the_shared_index(self):
+        blocklist.invalidate()
+        self.addCleanup(blocklist.invalidate)
+        self.assertIsNone(blocklist.lookup("198.51.100.9"))
+        self.block("198.51.100.9")
+        self.assertEqual(blocklist.lookup("198.51.100.9"), "abuse")
+
+
+class SignupBlockTests(TestCase):
+    def register(self, n, **extra):
+        extra.setdefault("REMOTE_ADDR", "10.0.0.0")
+        return self.client.post(reverse("register"), {
+            "username": f"burst{n}", "email": f"burst{n}@example.com", "password": "Sup3r$ecret!",
+            "phone_number": f"555000{n}",
+        }, **extra)
+
+    @override_settings(ABUSE_LIMITS={"signup_ip": {"window": 120, "limit": 1}})
+    def test_block_next_to_a_range_with_the_same_network_address(self):
+        BlockedIP.objects.create(ip_address="10.0.0.0", prefix_length=8)
+        # A range added by another process that this one hasn't reloaded yet
+        with mock.patch.object(blocklist, "lookup", return_value=None):
+            response = self.register(1)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(self.register(2).status_code, 201)
+
+        self.assertEqual(
+            sorted(BlockedIP.objects.values_list("ip_address", "prefix_length"), key=str),
+            [("10.0.0.0", 8), ("10.0.0.0", None)],
+        )
+        self.assertTrue(User.objects.get(username="burst1").is_suspicious)
+
+    @override_settings(ABUSE_LIMITS={"signup_ip": {"window": 120, "limit": 1}}, TRUSTED_PROXY_COUNT=1)
+    def test_spoofed_forwarded_for_blocks_the_sender_not_the_victim(self):
+        blocklist.invalidate()
+        self.addCleanup(blocklist.invalidate)
+        # The router appends the address it saw (8.8.8.8) to what the client sent
+        via_router = {"REMOTE_ADDR": "10.9.9.9", "HTTP_X_FORWARDED_FOR": "1.1.1.1, 8.8.8.8"}
+        self.assertEqual(self.register(1, **via_router).status_code, 201)
+
+        self.assertEqual(list(BlockedIP.objects.values_list("ip_address", flat=True)), ["8.8.8.8"])
+        self.assertEqual(User.objects.get(username="burst1").ip_address, "8.8.8.8")
+        blocklist.invalidate()  # the on_commit reload never runs inside TestCase
+        self.assertEqual(self.register(2, **via_router).status_code, 403)
+        self.assertEqual(self.register(3, REMOTE_ADDR="10.9.9.9", HTTP_X_FORWARDED_FOR="1.1.1.1").status_code, 201)
+
+
+class ClientIPTests(TestCase):
+    def resolve(self, trusted, forwarded=None):
+        meta = {"REMOTE_ADDR": "10.9.9.9"}
+        if forwarded is not None:
+            meta["HTTP_X_FORWARDED_FOR"] = forwarded
+        return resolve_client_ip(RequestFactory().get("/", **meta), trusted)
+
+    def test_takes_the_entry_added_by_the_outermost_trusted_proxy(self):
+        self.assertEqual(self.resolve(1, "8.8.8.8"), "8.8.8.8")
+        self.assertEqual(self.resolve(1, "10.0.0.1, 8.8.8.8"), "8.8.8.8")
+        self.assertEqual(self.resolve(2, "10.0.0.1, 8.8.8.8, 172.16.0.1"), "8.8.8.8")
+
+    def test_falls_back_to_the_socket_address(self):
+        self.assertEqual(self.resolve(0, "8.8.8.8"), "10.9.9.9")
+        self.assertEqual(self.resolve(1), "10.9.9.9")
+        self.assertEqual(self.resolve(1, "not-an-ip"), "10.9.9.9")
+
+
+class OrphanedMediaTests(TestCase):
+    def store(self, data, age=None):
+        name = default_storage.save("banners/photo.png", ContentFile(data))
+        if age is not None:
+            stamp = time.time() - age.total_seconds()
+            os.utime(default_storage.path(name), (stamp, stamp))
+        return name
+
+    def test_only_old_unreferenced_files_are_orphans(self):
+        old = self.store(b"old", age=GRACE_PERIOD * 2)
+        fresh = self.store(b"fresh")
+        kept = self.store(b"kept", age=GRACE_PERIOD * 2)
+        Banner.objects.create(image=kept)
+        self.assertEqual(orphaned_names([old, fresh, kept]), {old})
+
+    def test_reusing_a_stored_file_marks_it_fresh(self):
+        name = self.store(b"shared", age=GRACE_PERIOD * 2)
+        # Another upload of the same bytes whose row hasn't committed yet
+        self.assertEqual(self.store(b"shared"), name)
+        self.assertEqual(orphaned_names([name]), set())
+
+    def test_purge_leaves_files_inside_the_grace_period(self):
+        old = self.store(b"old", age=GRACE_PERIOD * 2)
+        fresh = self.store(b"fresh")
+        call_command("purge_orphaned_media", stdout=StringIO())
+        self.assertFalse(default_storage.exists(old))
+        self.assertTrue(default_storage.exists(fresh))
+
+
+class MigrationTests(TestCase):
+    def test_every_model_change_has_a_migration(self):
+        # Exits non-zero if makemigrations would write anything
+        call_command("makemigrations", "--check", "--dry-run", stdout=StringIO())
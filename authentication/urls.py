@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from authentication.views import RegisterView,AdminRegistrationView,UserLoginView,AdminLoginView,ProtectedView,MailboxView,DeleteMailboxView,Userlist,UserDetailsWithMailboxView,UpdateMailboxPriceView,GlobalAddressView,AddressBookView,SetDefaultAddressView,UserAddressListForAdminView,PasswordResetRequestView,PasswordResetConfirmView,ChangePasswordView,PayPalCheckoutView,PayPalExecutePaymentView,MailboxCheckoutDataView,GenerateUsername,AdminDeleteUserView,SuspiciousUserList,BlockedIPList,BannerUploadView,BannerListView,BannerDeleteView,SetActiveBannerView,AdminBannerList,AdminUpdateShipmentStatusView,AdminUserShipmentListView,ShippingCostByWeightView,BrandLogoUploadView, BrandLogoListView, AdminBrandLogoList, BrandLogoDeleteView, SetActiveBrandLogoView
+from authentication.views import RegisterView,AdminRegistrationView,UserLoginView,AdminLoginView,ProtectedView,MailboxView,MailboxBulkIntakeView,MailboxSummaryView,DeleteMailboxView,Userlist,UserDetailsWithMailboxView,UpdateMailboxPriceView,GlobalAddressView,AddressBookView,SetDefaultAddressView,UserAddressListForAdminView,PasswordResetRequestView,PasswordResetConfirmView,ChangePasswordView,PayPalCheckoutView,PayPalExecutePaymentView,PayPalExecuteStatusView,MailboxCheckoutDataView,GenerateUsername,AdminDeleteUserView,SuspiciousUserList,BlockedIPList,BannerUploadView,BannerListView,BannerDeleteView,SetActiveBannerView,AdminBannerList,AdminUpdateShipmentStatusView,AdminUserShipmentListView,ShippingCostByWeightView,ShippingQuoteBatchView,BrandLogoUploadView, BrandLogoListView, AdminBrandLogoList, BrandLogoDeleteView, SetActiveBrandLogoView
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path("admin/register/", AdminRegistrationView.as_view(), name="admin-register"),
@@ -10,6 +10,8 @@ urlpatterns = [
     path("protected/", ProtectedView.as_view(), name="protected"),
     path("mailbox/<int:user_id>/", MailboxView.as_view(), name="mailbox-list"),
     path("mailbox/create/", MailboxView.as_view(), name="mailbox-create"),
+    path("mailbox/bulk-create/", MailboxBulkIntakeView.as_view(), name="mailbox-bulk-create"),
+    path("mailbox/summary/", MailboxSummaryView.as_view(), name="mailbox-summary"),
     path("mailbox/delete/<int:pk>/", DeleteMailboxView.as_view(), name="mailbox-delete"),
     path("user_list/", Userlist.as_view(), name="user_list"),
     path("user-details/<int:pk>/", UserDetailsWithMailboxView.as_view(), name="user-details"),
@@ -24,6 +26,7 @@ urlpatterns = [
     path("change-password/", ChangePasswordView.as_view(), name="change-password"),
     path("paypal/checkout/", PayPalCheckoutView.as_view(), name="paypal-checkout"),
     path("paypal/execute/", PayPalExecutePaymentView.as_view(), name="paypal-execute"),
+    path("paypal/execute/status/<str:payment_id>/", PayPalExecuteStatusView.as_view(), name="paypal-execute-status"),
     path("mailbox/checkout-data/", MailboxCheckoutDataView.as_view(), name="mailbox-checkout-data"),
     path("generate-username/", GenerateUsername.as_view(), name="generate-username"),
     path("admin/user/<int:user_id>/delete/", AdminDeleteUserView.as_view(), name="admin-user-delete"),
@@ -37,6 +40,7 @@ urlpatterns = [
     path("admin/update-shipment-status/<int:shipment_id>/", AdminUpdateShipmentStatusView.as_view(), name="admin-user-shipments-update"),
     path("admin/user-shipments/<int:user_id>/", AdminUserShipmentListView.as_view(), name="admin-user-shipments"),
     path('shipping/price-by-weight/', ShippingCostByWeightView.as_view(), name='shipping-price-by-weight'),
+    path('shipping/quote-batch/', ShippingQuoteBatchView.as_view(), name='shipping-quote-batch'),
     path("admin/brand-logo/upload/", BrandLogoUploadView.as_view(), name="upload-brand-logo"),
     path("brand-logos/", BrandLogoListView.as_view(), name="get-brand-logos"),
     path("admin/brand-logos/", AdminBrandLogoList.as_view(), name="all-brand-logos"),
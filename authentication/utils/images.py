@@ -0,0 +1,138 @@
+import logging
+import os
+from io import BytesIO
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from authentication.jobs import enqueue
+from authentication.storage import release_files
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; aspect ratio is kept
+DERIVATIVE_SIZES = {
+    "image_thumbnail": 320,
+    "image_medium": 1280,
+}
+
+
+def derivative_format():
+    fmt = getattr(settings, "IMAGE_DERIVATIVE_FORMAT", "WEBP").upper()
+    if fmt == "WEBP" and not features.check("webp"):
+        return "JPEG"  # Pillow built without libwebp
+    return fmt
+
+
+def _encode(img, fmt):
+    buffer = BytesIO()
+    # No exif= argument, so EXIF (GPS, device serials) is dropped
+    if fmt == "WEBP":
+        img.save(buffer, "WEBP", quality=80, method=4)
+    else:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(buffer, "JPEG", quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render_derivatives(field_file):
+    """
+    Decode the original once and return {field_name: (extension, bytes)} for
+    every size in DERIVATIVE_SIZES, largest first.
+    """
+    fmt = derivative_format()
+    largest = max(DERIVATIVE_SIZES.values())
+    with field_file.open("rb"), Image.open(field_file) as original:
+        # JPEG can decode straight at a reduced scale, far cheaper for phone photos
+        original.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(original)  # bake in rotation before EXIF goes
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if img.has_transparency_data else "RGB")
+
+        results = {}
+        for field, size in sorted(DERIVATIVE_SIZES.items(), key=lambda item: -item[1]):
+            img.thumbnail((size, size), Image.LANCZOS)
+            results[field] = (fmt.lower(), _encode(img, fmt))
+    return results
+
+
+# Formats originals are kept in; anything else (MPO, HEIC, ...) becomes JPEG
+ORIGINAL_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+
+
+def _has_metadata(img):
+    return bool(img.getexif() or img.info.get("exif") or img.info.get("xmp") or img.info.get("XML:com.adobe.xmp"))
+
+
+def strip_metadata(field_file):
+    """
+    Re-encode the original at full size without EXIF/XMP (GPS, device
+    serials), keeping its rotation and colour profile. Returns
+    (extension, bytes), or None if it carries no such metadata.
+    """
+    with field_file.open("rb"), Image.open(field_file) as original:
+        if not _has_metadata(original):
+            return None
+        fmt = original.format if original.format in ORIGINAL_FORMATS else "JPEG"
+        icc_profile = original.info.get("icc_profile")
+        img = ImageOps.exif_transpose(original)
+
+        options = {"icc_profile": icc_profile} if icc_profile else {}
+        buffer = BytesIO()
+        if fmt == "JPEG":
+            if img.mode not in ("RGB", "L", "CMYK"):
+                img = img.convert("RGB")
+            img.save(buffer, "JPEG", quality=92, optimize=True, **options)
+        elif fmt == "WEBP":
+            img.save(buffer, "WEBP", quality=90, **options)
+        else:
+            img.save(buffer, fmt, **options)
+    return ORIGINAL_FORMATS[fmt], buffer.getvalue()
+
+
+def queue_image_derivatives(model, ids):
+    """Queue one job building derivatives for `ids` of `model`."""
+    ids = list(ids)
+    if ids:
+        enqueue("image_derivatives", {"model": model._meta.label_lower, "ids": ids})
+
+
+def build_image_derivatives(model_label, ids):
+    """
+    Build and store derivatives for the given rows, and replace originals
+    that carry EXIF with a stripped copy. Rows whose image changed again
+    meanwhile are left alone; the newer upload has its own job.
+    Returns the number of rows updated.
+    """
+    model = apps.get_model(model_label)
+    has_updated_at = any(f.name == "updated_at" for f in model._meta.get_fields())
+    done = 0
+    rows = model.objects.filter(pk__in=ids).exclude(image="").exclude(image__isnull=True).only("id", "image", *DERIVATIVE_SIZES)
+    for row in rows:
+        original_name = row.image.name
+        try:
+            derivatives = render_derivatives(row.image)
+            stripped = strip_metadata(row.image)
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+            logger.warning("Skipping derivatives for %s #%s: %s", model.__name__, row.pk, e)
+            continue
+
+        base = os.path.splitext(os.path.basename(original_name))[0]
+        values = {}
+        if stripped:
+            extension, data = stripped
+            row.image.save(f"{base}.{extension}", ContentFile(data), save=False)
+            values["image"] = row.image.name
+        for field, (extension, data) in derivatives.items():
+            field_file = getattr(row, field)
+            field_file.save(f"{base}_{field.split('_')[1]}.{extension}", ContentFile(data), save=False)
+            values[field] = field_file.name
+        if has_updated_at:
+            values["updated_at"] = timezone.now()
+        updated = model.objects.filter(pk=row.pk, image=original_name).update(**values)
+        if updated and values.get("image", original_name) != original_name:
+            release_files([original_name])  # a shipment copied from this mailbox may still use it
+        done += updated
+    return done
@@ -1,29 +1,67 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
-from django.conf import settings
-import os
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from io import BytesIO
 from datetime import datetime
 
+PAGE_WIDTH, PAGE_HEIGHT = letter
 
-def generate_invoice(user, payment_id, items):
-    invoice_dir = os.path.join(settings.MEDIA_ROOT, "invoices")
-    os.makedirs(invoice_dir, exist_ok=True)
 
-    file_path = os.path.join(invoice_dir, f"invoice_{payment_id}.pdf")
-    c = canvas.Canvas(file_path, pagesize=letter)
-    width, height = letter
+def _define_page_furniture(c):
+    """
+    Draw the static header and item-table chrome once as PDF form XObjects;
+    every page then references them instead of re-drawing the same shapes.
+    """
+    width, height = PAGE_WIDTH, PAGE_HEIGHT
 
     # === Header ===
+    c.beginForm("header", lowerx=0, lowery=height - 70, upperx=width, uppery=height)
     c.setFont("Helvetica-Bold", 18)
     c.setFillColor(colors.HexColor("#333366"))
     c.drawString(50, height - 50, "ShipShopGlobal")
+    c.setStrokeColor(colors.gray)
+    c.line(50, height - 60, width - 50, height - 60)
+    c.endForm()
+
+    # Table Headers, drawn at y=0 and translated into place
+    c.beginForm("table_header", lowerx=0, lowery=-10, upperx=width, uppery=20)
+    c.setFillColor(colors.HexColor("#f0f0f0"))
+    c.rect(50, -5, width - 100, 20, fill=1, stroke=0)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(55, 0, "Item")
+    c.drawString(220, 0, "Price")
+    c.drawString(300, 0, "Weight")
+    c.drawString(370, 0, "Dimension")
+    c.drawString(470, 0, "Tracking #")
+    c.endForm()
+
+
+def _draw_table_header(c, y):
+    c.saveState()
+    c.translate(0, y)
+    c.doForm("table_header")
+    c.restoreState()
+
+
+def _start_page(c, invoice_date):
+    c.doForm("header")
     c.setFont("Helvetica", 10)
     c.setFillColor(colors.black)
-    c.drawRightString(width - 50, height - 50, f"Invoice Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    c.drawRightString(PAGE_WIDTH - 50, PAGE_HEIGHT - 50, f"Invoice Date: {invoice_date}")
 
-    c.setStrokeColor(colors.gray)
-    c.line(50, height - 60, width - 50, height - 60)
+
+def render_invoice(user, payment_id, items):
+    """Render the invoice PDF in memory and return its bytes."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    invoice_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    _define_page_furniture(c)
+    _start_page(c, invoice_date)
 
     # === User & Payment Info ===
     y = height - 100
@@ -45,17 +83,8 @@ def generate_invoice(user, payment_id, items):
     c.setFont("Helvetica-Bold", 12)
     c.drawString(50, y, "Purchased Items")
 
-    # Table Headers
     y -= 20
-    c.setFillColor(colors.HexColor("#f0f0f0"))
-    c.rect(50, y - 5, width - 100, 20, fill=1, stroke=0)
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(55, y, "Item")
-    c.drawString(220, y, "Price")
-    c.drawString(300, y, "Weight")
-    c.drawString(370, y, "Dimension")
-    c.drawString(470, y, "Tracking #")
+    _draw_table_header(c, y)
 
     # Table Rows
     c.setFont("Helvetica", 10)
@@ -73,7 +102,11 @@ def generate_invoice(user, payment_id, items):
 
         if y < 100:
             c.showPage()
-            y = height - 50
+            _start_page(c, invoice_date)
+            y = height - 100
+            _draw_table_header(c, y)
+            c.setFont("Helvetica", 10)
+            y -= 25
 
     # === Total Section ===
     y -= 10
@@ -90,4 +123,13 @@ def generate_invoice(user, payment_id, items):
     c.drawString(50, y, "Thank you for shopping with ShipShopGlobal. Have a great day!")
 
     c.save()
-    return file_path
+    return buffer.getvalue()
+
+
+def generate_invoice(user, payment_id, items):
+    """
+    Render the invoice and store it once for the payment. Returns the storage
+    name, which every shipment of the order references instead of a copy.
+    """
+    pdf = render_invoice(user, payment_id, items)
+    return default_storage.save(f"invoices/invoice_{payment_id}.pdf", ContentFile(pdf))
@@ -0,0 +1,97 @@
+import os
+import threading
+from functools import lru_cache
+from django.conf import settings
+from django.db.models import Count, Max
+from django.template.loader import get_template, render_to_string
+from django.utils.html import escape
+from authentication.models import GlobalAddress
+
+TEMPLATE_NAME = "welcome_letter.html"
+
+# Per-user values are rendered as these tokens once, then swapped in per letter
+USER_FIELDS = {
+    "first_name": "__WELCOME_FIRST_NAME__",
+    "full_name": "__WELCOME_FULL_NAME__",
+    "unique_user_id": "__WELCOME_UNIQUE_USER_ID__",
+}
+
+_lock = threading.Lock()
+_cache = {"version": None, "skeleton": None, "resources": {}}
+
+
+def _logo_path():
+    return os.path.join(settings.MEDIA_ROOT, "images", "logo.png")
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def letter_version():
+    """
+    Everything the shared part of the letter depends on: the global address
+    set (count + last edit + last id catches adds, edits and deletes), the
+    template file and the logo.
+    """
+    addresses = GlobalAddress.objects.aggregate(count=Count("id"), updated=Max("updated_at"), last_id=Max("id"))
+    template_path = get_template(TEMPLATE_NAME).origin.name
+    return (
+        addresses["count"], addresses["updated"], addresses["last_id"],
+        _mtime(template_path), _mtime(_logo_path()),
+    )
+
+
+@lru_cache(maxsize=None)
+def _cached_url_fetcher_class():
+    # Imported here so a broken WeasyPrint install can't stop Django from starting
+    from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+    class CachedURLFetcher(URLFetcher):
+        """Fetches the logo once per letter version instead of once per letter."""
+
+        def fetch(self, url, headers=None):
+            resources = _cache["resources"]
+            if url not in resources:
+                response = super().fetch(url, headers)
+                try:
+                    resources[url] = (response.url, response.read(), list(response.headers.items()), response.status)
+                finally:
+                    response.close()
+            final_url, body, response_headers, status = resources[url]
+            return URLFetcherResponse(final_url, body, dict(response_headers), status)
+
+    return CachedURLFetcher
+
+
+def _skeleton():
+    version = letter_version()
+    if _cache["version"] == version:
+        return _cache["skeleton"]
+
+    with _lock:
+        if _cache["version"] != version:
+            context = dict(USER_FIELDS)
+            context["global_addresses"] = GlobalAddress.objects.all()
+            context["logo_url"] = f"file://{_logo_path()}"
+            _cache["skeleton"] = render_to_string(TEMPLATE_NAME, context)
+            _cache["resources"] = {}
+            _cache["version"] = version
+    return _cache["skeleton"]
+
+
+def render_welcome_letter(user):
+    """Return the welcome-letter PDF bytes for `user`."""
+    values = {
+        "first_name": user.first_name or "Valued Customer",
+        "full_name": f"{user.first_name or ''} {user.last_name or ''}".strip() or "ShipShop User",
+        "unique_user_id": user.unique_user_id,
+    }
+    html_string = _skeleton()
+    for field, token in USER_FIELDS.items():
+        html_string = html_string.replace(token, escape(values[field]))
+    from weasyprint import HTML
+    return HTML(string=html_string, url_fetcher=_cached_url_fetcher_class()()).write_pdf()
@@ -3,88 +3,47 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
-from authentication.serializers import UserSerializer, MailboxSerializer, GlobalAddressSerializer, AddressBookSerializer, PasswordResetSerializer, PasswordResetConfirmSerializer, ChangePasswordSerializer, BannerSerializer, BrandLogoSerializer
-from authentication.models import Mailbox,GlobalAddress,AddressBook,BlockedIP, Banner, BrandLogo
-from django.core.mail import send_mail,EmailMessage
+from authentication.serializers import UserSerializer, MailboxSerializer, MailboxIntakeItemSerializer, MailboxSummarySerializer, GlobalAddressSerializer, AddressBookSerializer, PasswordResetSerializer, PasswordResetConfirmSerializer, ChangePasswordSerializer, BannerSerializer, BrandLogoSerializer
+from authentication.models import Mailbox,GlobalAddress,AddressBook,BlockedIP, Banner, BrandLogo, BackgroundJob
 from django.conf import settings
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth import get_user_model
-import paypalrestsdk
 import logging
-from .utils.invoice import generate_invoice
+from . import idempotency
+from .abuse import check_signup
+from .jobs import enqueue
+from .paypal_gateway import PayPalError, PayPalUnavailable, approval_url, get_gateway
+from .mail_queue import queue_email
+from .utils.images import queue_image_derivatives
+from .summaries import mailbox_totals, recompute_summaries, summary_for
 import math
 from decimal import Decimal
 from django.core.files import File
 import os
-from .shipping_price_calculator import load_price_slab, get_price_for_weight
+import json
+from .shipping_price_calculator import get_rate_card, calculate_shipping_prices, quote_parcel, quote_parcels, DEFAULT_RATES_FILE
 from shipping.models import Shipment
-from django.utils.timezone import now, timedelta
-from rest_framework.parsers import MultiPartParser, FormParser
-from django.template.loader import render_to_string
-from weasyprint import HTML
+from shipping.pagination import paginate_shipments, PaginationError
+from django.db import transaction
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
+from django.urls import reverse
 from io import BytesIO
 
 User = get_user_model()
 
-def get_real_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]  # first IP is client IP
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
 class ProtectedView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         return Response({"message": "Welcome! You are authenticated."})
 
-def send_welcome_email(user):
-    try:
-        global_addresses = GlobalAddress.objects.all()
-        logo_path = os.path.join(settings.MEDIA_ROOT, "images", "logo.png")
-
-        context = {
-            "first_name": user.first_name or "Valued Customer",
-            "full_name": f"{user.first_name or ''} {user.last_name or ''}".strip() or "ShipShop User",
-            "unique_user_id": user.unique_user_id,
-            "global_addresses": global_addresses,
-            "logo_url": f"file://{logo_path}"
-        }
-
-        html_string = render_to_string("welcome_letter.html", context)
-        pdf_file = BytesIO()
-        HTML(string=html_string).write_pdf(pdf_file)
-        pdf_file.seek(0)
-
-        subject = "Welcome to ShipShopGlobal"
-        message = f"""
-        Hi {user.first_name or user.username},
-
-        Welcome to ShipShopGlobal! Attached is your welcome letter PDF with details on how to use your shipping address.
-
-        Thank you,
-        Team ShipShopGlobal
-        """
-
-        email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
-        email.attach("ShipShopGlobal_Welcome.pdf", pdf_file.read(), "application/pdf")
-        email.send()
-
-    except Exception as e:
-        print("❌ Email send failed:", e)
-
 class RegisterView(APIView):
     def post(self, request):
         data = request.data.copy()
-        client_ip = get_real_ip(request)
-
-        # 🔐 Blocked IP check
-        if BlockedIP.objects.filter(ip_address=client_ip).exists():
-            return Response({"detail": "Registrations from this IP are blocked."}, status=403)
+        # Resolved by IPTrackingMiddleware, which already rejected blocked IPs
+        client_ip = request.client_ip
 
         data['email'] = data.get('email', '').lower()
         if 'username' in data:
@@ -93,32 +52,22 @@ class RegisterView(APIView):
         if User.objects.filter(email=data['email']).exists():
             return Response({"detail": "User with this email already exists."}, status=400)
 
-        # 🔍 Suspicious check: last 10 mins, same IP
-        time_threshold = now() - timedelta(minutes=10)
-        users = User.objects.filter(ip_address=client_ip, date_joined__gte=time_threshold).order_by('-date_joined')
-
-        is_suspicious = False
-        if len(users) >= 2:
-            try:
-                time_diff = (users[0].date_joined - users[-1].date_joined).total_seconds()
-                if len(users) + 1 >= 3 and time_diff <= 120:
-                    is_suspicious = True
-            except IndexError:
-                pass
-
         serializer = UserSerializer(data=data)
         if serializer.is_valid():
+            # 🔍 Suspicious check: signup bursts per IP / email domain (cache counters)
+            is_suspicious, block_ip = check_signup(client_ip, data['email'])
+
             user = serializer.save()
             user.ip_address = client_ip
             user.is_suspicious = is_suspicious
             user.save()
             # 🚫 Auto block IP if suspicious
-            if is_suspicious:
-                BlockedIP.objects.get_or_create(ip_address=client_ip)
+            if block_ip:
+                BlockedIP.objects.get_or_create(ip_address=client_ip, prefix_length=None)
             response = Response({"detail": "Registration successful."}, status=201)
 
-            # ✉️ Then send mail
-            # send_welcome_email(user)
+            # ✉️ Then send mail (rendered by the background worker)
+            enqueue("send_welcome_email", {"user_id": user.id}, reference=str(user.id))
 
             return response
         return Response(serializer.errors, status=400)
@@ -137,7 +86,7 @@ class BlockedIPList(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def get(self, request):
-        blocked = BlockedIP.objects.all().values("ip_address", "reason", "blocked_at")
+        blocked = BlockedIP.objects.all().values("ip_address", "prefix_length", "reason", "blocked_at")
         return Response(blocked)
 
     def delete(self, request, user_id):
@@ -146,7 +95,7 @@ class BlockedIPList(APIView):
             user.is_suspicious = False
             user.save()
             # Optional: unblock IP too
-            BlockedIP.objects.filter(ip_address=user.ip_address).delete()
+            BlockedIP.objects.filter(ip_address=user.ip_address, prefix_length=None).delete()
             return Response({"detail": "User and IP unblocked."})
         except User.DoesNotExist:
             return Response({"detail": "User not found."}, status=404)
@@ -165,7 +114,7 @@ class GenerateUsername(APIView):
 
 class AdminRegistrationView(APIView):
     def post(self, request):
-        client_ip = get_real_ip(request)
+        client_ip = request.client_ip
         allowed_ip = "192.168.1.8"  # Replace with your specific IP
 
         if client_ip != allowed_ip:
@@ -189,25 +138,20 @@ class AdminRegistrationView(APIView):
 
 class AdminUserShipmentListView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
+    FIELDS = [
+        "id", "item_name", "product_value", "tracking_number", "shipping_price", "status",
+        "weight", "dimension", "invoice_url", "image", "thumbnail", "created_at",
+    ]
 
     def get(self, request, user_id):
-        shipments = Shipment.objects.filter(user_id=user_id).order_by("-created_at")
-
-        data = [{
-            "id":s.id,
-            "item_name": s.item_name,
-            "product_value": s.product_value,
-            "tracking_number": s.tracking_number,
-            "shipping_price": s.shipping_price,
-            "status": s.status,
-            "weight": s.weight,
-            "dimension": s.dimension,
-            "invoice_url": request.build_absolute_uri(s.invoice_pdf.url) if s.invoice_pdf else None,
-            "image": request.build_absolute_uri(s.image.url) if s.image else None,
-            "created_at": s.created_at
-        } for s in shipments]
+        shipments = Shipment.objects.filter(user_id=user_id)
 
-        return Response(data, status=200)
+        try:
+            page = paginate_shipments(request, shipments, self.FIELDS)
+        except PaginationError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response(page, status=200)
 
 class AdminUpdateShipmentStatusView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -269,7 +213,7 @@ class UserLoginView(APIView):
 
 class AdminLoginView(APIView):
     def post(self, request):
-        client_ip = get_real_ip(request)
+        client_ip = request.client_ip
 
         username = request.data.get("username")
         password = request.data.get("password")
@@ -301,24 +245,6 @@ class AdminLoginView(APIView):
             return Response({"detail": "Invalid credentials."}, status=status.HTTP_401_UNAUTHORIZED)
 
 
-def calculate_shipping_price(mailbox, slab_file_path=None):
-    try:
-        dims = [float(x) for x in mailbox.dimension.split("x")]
-        length, width, height = dims if len(dims) == 3 else (1, 1, 1)
-        volumetric_weight = (length * width * height) / 5000
-        actual_weight = float(mailbox.weight)
-        final_weight = max(volumetric_weight, actual_weight)
-        final_weight = math.ceil(final_weight)  # always round up for slabs
-
-        price_slab = load_price_slab(slab_file_path)
-        price = get_price_for_weight(final_weight, price_slab)
-
-        return Decimal(str(price))  # return as Decimal for DB
-    except Exception as e:
-        print("Shipping price calculation failed:", e)
-        return Decimal("0.00")
-
-
 class MailboxView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -345,19 +271,97 @@ class MailboxView(APIView):
         serializer = MailboxSerializer(data=data)
 
         if serializer.is_valid():
+            # Priced by the pre_save signal, so this is the only write
             serializer.save()
-            mailbox = Mailbox.objects.get(id=serializer.data["id"])
-            # shipping_price = calculate_shipping_price(mailbox)  # use dummy or slab file
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            slab_file_path = os.path.join(project_root, "shipping_rates.csv")
-            print("slab file path", slab_file_path)
-            shipping_price = calculate_shipping_price(mailbox, slab_file_path=slab_file_path)
-            mailbox.shipping_price = shipping_price
-            mailbox.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class MailboxBulkIntakeView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    MAX_ITEMS = 1000
+
+    def post(self, request):
+        if not request.user.is_superuser:
+            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        # Multipart: "items" is a JSON string and each item's "image" names the
+        # uploaded file field holding its photo (every Mailbox needs one).
+        items = request.data.get("items")
+        if isinstance(items, str):
+            try:
+                items = json.loads(items)
+            except ValueError:
+                return Response({"detail": "items must be valid JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        if not items or not isinstance(items, list):
+            return Response({"detail": "items must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAX_ITEMS:
+            return Response({"detail": f"At most {self.MAX_ITEMS} items per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        valid = []  # (index, validated_data)
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {"index": index, "errors": {"detail": "Item must be an object."}}
+                continue
+
+            data = {key: value for key, value in item.items() if key != "image"}
+            if isinstance(item.get("image"), str):
+                data["image"] = request.FILES.get(item["image"])
+            serializer = MailboxIntakeItemSerializer(data=data)
+            if not serializer.is_valid():
+                results[index] = {"index": index, "errors": serializer.errors}
+                continue
+            valid.append((index, serializer.validated_data))
+
+        users = User.objects.in_bulk({data["user_id"] for _, data in valid})
+
+        pending = []  # (index, Mailbox)
+        for index, data in valid:
+            user = users.get(data.pop("user_id"))
+            if user is None:
+                results[index] = {"index": index, "errors": {"user_id": "User not found."}}
+                continue
+
+            mailbox = Mailbox(user=user, **data)
+            mailbox.sync_measurements()  # bulk_create skips save()
+            pending.append((index, mailbox))
+
+        if pending:
+            mailboxes = [mailbox for _, mailbox in pending]
+            for mailbox, price in zip(mailboxes, calculate_shipping_prices(mailboxes)):
+                mailbox.shipping_price = price
+            with transaction.atomic():
+                Mailbox.objects.bulk_create(mailboxes, batch_size=500)
+                recompute_summaries({mailbox.user_id for mailbox in mailboxes})  # bulk_create sends no signals
+                queue_image_derivatives(Mailbox, [mailbox.id for mailbox in mailboxes if mailbox.image])
+            for index, mailbox in pending:
+                results[index] = {"index": index, "id": mailbox.id, "shipping_price": mailbox.shipping_price}
+
+        return Response({
+            "created": len(pending),
+            "failed": len(items) - len(pending),
+            "results": results,
+        }, status=status.HTTP_201_CREATED if pending else status.HTTP_400_BAD_REQUEST)
+
+class MailboxSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user_id = request.user.id
+        if request.GET.get("user_id"):
+            if not request.user.is_superuser:
+                return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                user_id = int(request.GET["user_id"])
+            except ValueError:
+                return Response({"detail": "user_id must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+            if not User.objects.filter(id=user_id).exists():
+                return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(MailboxSummarySerializer(summary_for(user_id)).data, status=status.HTTP_200_OK)
+
 class UpdateMailboxPriceView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -531,7 +535,8 @@ class UserDetailsWithMailboxView(APIView):
             return Response({
                 "user_details": user_serializer.data,
                 "default_address": default_address_data,
-                "mailbox_items": mailbox_serializer.data
+                "mailbox_items": mailbox_serializer.data,
+                "mailbox_summary": MailboxSummarySerializer(summary_for(user.id)).data,
             }, status=status.HTTP_200_OK)
         except User.DoesNotExist:
             return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -623,11 +628,10 @@ class PasswordResetRequestView(APIView):
             frontend_base_url = "https://shipshopglobal.com"  # Replace this with your React app URL
             reset_link = f"{frontend_base_url}/reset-password/{uid}/{token}"
 
-            send_mail(
+            queue_email(
                 subject="Password Reset Request",
-                message=f"Use the link below to reset your password (valid for 15 mins):\n\n{reset_link}",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
+                body=f"Use the link below to reset your password (valid for 15 mins):\n\n{reset_link}",
+                to=[email],
             )
 
             return Response({"detail": "Password reset link sent."}, status=status.HTTP_200_OK)
@@ -673,6 +677,30 @@ class ChangePasswordView(APIView):
 
 logger = logging.getLogger(__name__)
 
+def paypal_unavailable(error):
+    logger.warning("PayPal unavailable: %s", error)
+    response = Response({"detail": "Payment service is temporarily unavailable. Please try again shortly."}, status=503)
+    response["Retry-After"] = str(get_gateway().breaker.retry_after() or 5)
+    return response
+
+
+def paypal_refused(error, detail):
+    """
+    PayPal answered with a 4xx. Errors about the payment go back to the client
+    (409 if it was already executed); a rejected token is our misconfiguration.
+    """
+    if error.status in (401, 403):
+        logger.error("PayPal rejected our credentials: %s", error)
+        return Response({"detail": "Payment service is misconfigured."}, status=502)
+    if error.details.get("name") == "PAYMENT_ALREADY_DONE":
+        code = 409
+    elif error.status == 404:
+        code = 404
+    else:
+        code = 400
+    return Response({"detail": detail, "error": error.details}, status=code)
+
+
 class PayPalCheckoutView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -689,12 +717,13 @@ class PayPalCheckoutView(APIView):
             else:
                 mailbox_items = Mailbox.objects.filter(id__in=item_ids, user=request.user)
 
-            if not mailbox_items.exists():
+            totals = mailbox_totals(mailbox_items)
+            if not totals["item_count"]:
                 return Response({"detail": "No mailbox items found."}, status=404)
 
-            amount = sum(float(item.shipping_price or 0) for item in mailbox_items)
+            amount = float(totals["total_shipping"])
 
-            payment = paypalrestsdk.Payment({
+            payment = get_gateway().create_payment({
                 "intent": "sale",
                 "payer": {"payment_method": "paypal"},
                 "redirect_urls": {
@@ -719,17 +748,18 @@ class PayPalCheckoutView(APIView):
                 }]
             })
 
-            if payment.create():
-                for link in payment.links:
-                    if link.rel == "approval_url":
-                        return Response({
-                            "payment_id": payment.id,
-                            "approval_url": str(link.href)
-                        }, status=200)
-                return Response({"detail": "Approval URL not found."}, status=500)
-            else:
-                return Response({"detail": "PayPal creation failed", "error": payment.error}, status=500)
+            url = approval_url(payment)
+            if url:
+                return Response({
+                    "payment_id": payment["id"],
+                    "approval_url": url
+                }, status=200)
+            return Response({"detail": "Approval URL not found."}, status=500)
 
+        except PayPalUnavailable as e:
+            return paypal_unavailable(e)
+        except PayPalError as e:
+            return paypal_refused(e, "PayPal creation failed")
         except Exception as e:
             import traceback
             logger.error(traceback.format_exc())
@@ -744,70 +774,76 @@ class PayPalExecutePaymentView(APIView):
         payer_id = request.data.get("payer_id")
         item_ids = request.data.get("item_ids", [])
 
-        try:
-            payment = paypalrestsdk.Payment.find(payment_id)
+        if not payment_id:
+            return Response({"detail": "payment_id is required."}, status=400)
 
-            if payment.execute({"payer_id": payer_id}):
-                mailbox_items = Mailbox.objects.filter(id__in=item_ids, user=request.user)
-                if not mailbox_items.exists():
-                    return Response({"detail": "No mailbox items found."}, status=404)
-
-                items = []
-                for mailbox in mailbox_items:
-                    items.append({
-                        "name": mailbox.item_name,
-                        "price": str(mailbox.shipping_price),
-                        "weight": mailbox.weight,
-                        "dimension": mailbox.dimension,
-                        "tracking_number": mailbox.tracking_number,
-                    })
-
-                # ✅ Send invoice email
-                invoice_path = generate_invoice(request.user, payment_id, items)
-                invoice_filename = os.path.basename(invoice_path)
-                invoice_url = request.build_absolute_uri(
-                    settings.MEDIA_URL + "invoices/" + invoice_filename
-                )
-                # Open the file and save as Django File object
-                with open(invoice_path, "rb") as f:
-                    invoice_file = File(f)
-
-                    for mailbox in mailbox_items:
-                        shipment = Shipment.objects.create(
-                            user=mailbox.user,
-                            item_name=mailbox.item_name,
-                            product_value=mailbox.product_value,
-                            tracking_number=mailbox.tracking_number,
-                            image=mailbox.image,
-                            weight=mailbox.weight,
-                            dimension=mailbox.dimension,
-                            shipping_price=mailbox.shipping_price,
-                            status="in_transit"
-                        )
-                        shipment.invoice_pdf.save(invoice_filename, invoice_file, save=True)
-                        mailbox.delete()
-
-                subject = "Your Payment Invoice - ShipShopGlobal"
-                message = f"Hi {request.user.username},\n\nPlease find attached your invoice for payment ID {payment_id}."
-                email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [request.user.email])
-                email.attach_file(invoice_path)
-                email.send()
+        # Client retries (same payment and Idempotency-Key) get the first answer
+        # back without calling PayPal or queueing the invoice again.
+        record, replay = idempotency.begin(
+            request, f"paypal-execute:{payment_id}", {"payer_id": payer_id, "item_ids": item_ids}
+        )
+        if replay is not None:
+            return replay
 
-                return Response({
-                    "detail": "Payment & shipment successful!",
-                    "invoice_url": invoice_url,
-                    "payment_id": payment_id
-                }, status=200)
+        try:
+            response = self.execute(request, payment_id, payer_id, item_ids)
+        except BaseException:
+            idempotency.abandon(record)
+            raise
+        idempotency.finish(record, response)
+        return response
+
+    def execute(self, request, payment_id, payer_id, item_ids):
+        try:
+            get_gateway().execute_payment(payment_id, payer_id)
 
-            else:
-                return Response({"detail": "Payment execution failed.", "error": payment.error}, status=500)
+            mailbox_items = Mailbox.objects.filter(id__in=item_ids, user=request.user)
+            if not mailbox_items.exists():
+                return Response({"detail": "No mailbox items found."}, status=404)
 
+            # Invoice, shipments and email are handled by the background worker
+            enqueue("finalise_payment", {
+                "user_id": request.user.id,
+                "payment_id": payment_id,
+                "item_ids": list(mailbox_items.values_list("id", flat=True)),
+            }, reference=payment_id)
+
+            return Response({
+                "detail": "Payment successful! Your invoice and shipments are being prepared.",
+                "payment_id": payment_id,
+                "status": "queued",
+                "status_url": request.build_absolute_uri(
+                    reverse("paypal-execute-status", args=[payment_id])
+                ),
+            }, status=202)
+
+        except PayPalUnavailable as e:
+            return paypal_unavailable(e)
+        except PayPalError as e:
+            return paypal_refused(e, "Payment execution failed.")
         except Exception as e:
             import traceback
             logger.error(traceback.format_exc())
             return Response({"detail": "Server error", "error": str(e)}, status=500)
 
 
+class PayPalExecuteStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, payment_id):
+        job = BackgroundJob.objects.filter(kind="finalise_payment", reference=payment_id).order_by("-id").first()
+        if not job or (job.payload.get("user_id") != request.user.id and not request.user.is_superuser):
+            return Response({"detail": "Payment not found."}, status=404)
+
+        data = {"payment_id": payment_id, "status": job.status}
+        if job.status == "done":
+            data["detail"] = "Payment & shipment successful!"
+            data["invoice_url"] = request.build_absolute_uri(job.result["invoice_url"])
+        elif job.status == "failed":
+            data["detail"] = "We could not finalise this order. Our team has been notified."
+        else:
+            data["detail"] = "Your invoice and shipments are being prepared."
+        return Response(data, status=200)
 
 
 class MailboxCheckoutDataView(APIView):
@@ -825,13 +861,14 @@ class MailboxCheckoutDataView(APIView):
         else:
             mailbox_items = Mailbox.objects.filter(id__in=item_ids, user=request.user)
 
-        if not mailbox_items.exists():
+        totals = mailbox_totals(mailbox_items)
+        if not totals["item_count"]:
             return Response({"detail": "No mailbox items found."}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = MailboxSerializer(mailbox_items, many=True)
         return Response({
             "checkout_items": serializer.data,
-            "total_price": sum(item.product_value for item in mailbox_items),
+            "total_price": totals["total_value"],
             "user_id": request.user.id,
             "user_email": request.user.email,
         }, status=status.HTTP_200_OK)
@@ -847,12 +884,9 @@ class ShippingCostByWeightView(APIView):
             if not final_weight:
                 return Response({"detail": "final_weight is required."}, status=400)
 
-            final_weight = math.ceil(float(final_weight))  # round up for slabs
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            slab_file_path = os.path.join(project_root, "shipping_rates.csv")
-            print("slab file path", slab_file_path)
-            price_slab = load_price_slab(slab_file_path)
-            shipping_price = get_price_for_weight(final_weight, price_slab)
+            rate_card = get_rate_card(DEFAULT_RATES_FILE)
+            # No dimension: the weight is already final, quote_parcel just rounds it up for slabs
+            final_weight, shipping_price = quote_parcel(final_weight, None, rate_card)
 
             return Response({
                 "final_weight": final_weight,
@@ -865,3 +899,44 @@ class ShippingCostByWeightView(APIView):
             return Response({"detail": "Something went wrong.", "error": str(e)}, status=500)
 
 
+class ShippingQuoteBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_PARCELS = 500
+
+    def post(self, request):
+        parcels = request.data.get("parcels")
+
+        if not parcels or not isinstance(parcels, list):
+            return Response({"detail": "parcels must be a non-empty list."}, status=400)
+        if len(parcels) > self.MAX_PARCELS:
+            return Response({"detail": f"At most {self.MAX_PARCELS} parcels per request."}, status=400)
+
+        try:
+            rate_card = get_rate_card(DEFAULT_RATES_FILE)
+        except Exception as e:
+            import traceback
+            logger.error(traceback.format_exc())
+            return Response({"detail": "Something went wrong.", "error": str(e)}, status=500)
+
+        pairs = []
+        for parcel in parcels:
+            if not isinstance(parcel, dict):
+                pairs.append((None, None))
+            elif parcel.get("final_weight") not in (None, ""):
+                # Already-computed weight: price it as-is, like ShippingCostByWeightView
+                pairs.append((parcel["final_weight"], None))
+            else:
+                pairs.append((parcel.get("weight"), parcel.get("dimension")))
+
+        quotes = []
+        for index, (final_weight, price, error) in enumerate(quote_parcels(pairs, rate_card)):
+            if error:
+                quotes.append({"index": index, "error": error})
+            else:
+                quotes.append({
+                    "index": index,
+                    "final_weight": final_weight,
+                    "shipping_price": float(price),
+                })
+
+        return Response({"quotes": quotes}, status=200)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -68,6 +69,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'authentication.middleware.IPTrackingMiddleware',  # early: blocked IPs stop here
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,7 +78,6 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'authentication.middleware.IPTrackingMiddleware',
     'shipglobal_backend.middleware.CustomAuthExceptionMiddleware'
 ]
 
@@ -170,6 +171,12 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored by content hash under media/content/; see authentication.storage
+STORAGES = {
+    "default": {"BACKEND": "authentication.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -183,13 +190,63 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = "shipshopglobal25@gmail.com"  # Replace with your email
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 EMAIL_HOST_PASSWORD = "xxta bkem pbpx vhnw"  # Replace with your email password
+# Receive failure alerts for background jobs (authentication.jobs.notify_admins)
+ADMINS = [("ShipShop Support", EMAIL_HOST_USER)]
 
 # Stripe Settings
 STRIPE_SECRET_KEY = "sk_test_51QZbI8DYqUXVomcLwlaLiPsSu3PQLSXrxWH0BOXNJmmFxCDeBt51JvEAmKyvIC36ilYnU27ic8dlSzOLj6fCjMqr002OlrHQhV"
 STRIPE_PUBLIC_KEY = "pk_test_51QZbI8DYqUXVomcL6onQ3XSMZ1yzKJJUjLoN6YkKTgWxYc3EkRr30KQJNTjzvXrUvbMvJyvhwCB9GHOrMuFStpw100Y6nEvxK9"
+# PayPal (authentication.paypal_gateway)
+# Credentials come from the environment; set PAYPAL_MODE=live in production
+PAYPAL_MODE = os.environ.get("PAYPAL_MODE", "sandbox")
+PAYPAL_CLIENT_ID = os.environ.get("PAYPAL_CLIENT_ID", "")
+PAYPAL_CLIENT_SECRET = os.environ.get("PAYPAL_CLIENT_SECRET", "")
+PAYPAL_API_BASE = None  # overrides PAYPAL_MODE, e.g. "http://127.0.0.1:8766" for python -m shipping.fakes paypal
+PAYPAL_TIMEOUT = (3.05, 15)  # (connect, read) seconds
+PAYPAL_POOL_SIZE = 10
+PAYPAL_CIRCUIT_BREAKER = {"failure_threshold": 5, "reset_after": 30}
 # SHIPGLOBAL_SHIPMENT_URL = "https://www.shipglobal.us/api/shipmentprocess"
 # Or for dev:
 SHIPGLOBAL_LIVE_MODE = False  # Set True in live
 SHIPGLOBAL_SHIPMENT_URL = "https://www.shipglobal.us/api/testshipmentprocess"
+SHIPGLOBAL_TIMEOUT = (5, 30)  # (connect, read) seconds per label request
 USE_X_FORWARDED_HOST = True
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# Shared by every gunicorn worker on the host, for the signup burst counters
+# (authentication.abuse) and single-use stream tickets (shipping.live).
+# incr() on the file cache is a read-modify-write, not atomic, so signups
+# landing at the same moment can undercount; use Redis or Memcached when
+# running on more than one host.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "shipglobal-cache"),
+    },
+}
+ABUSE_CACHE = "default"
+ABUSE_LIMITS = {
+    "signup_ip": {"window": 120, "limit": 3},  # 3rd signup from one IP in 2 min: flag + block IP
+    "signup_email_domain": {"window": 600, "limit": 20},  # flag only
+}
+
+# Proxies in front of the app that append to X-Forwarded-For (the Heroku
+# router is one); 0 trusts REMOTE_ADDR only. See IPTrackingMiddleware.
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", "1"))
+
+# How often each process checks the BlockedIP table for changes (seconds)
+BLOCKLIST_RECHECK_SECONDS = 5
+
+# Live shipment status push (api/shipping/shipments/live/, served by the ASGI
+# app). DatabaseBroker sees changes from every process; InProcessBroker only
+# those made inside the serving process.
+SHIPMENT_EVENT_BROKER = "shipping.events.DatabaseBroker"
+STREAM_TICKET_SECONDS = 30  # lifetime of a ?ticket= from shipments/live/ticket/
+
+# Mailbox/shipment photo renditions; falls back to JPEG without libwebp
+IMAGE_DERIVATIVE_FORMAT = "WEBP"
+
+# Carrier tracking poller (manage.py poll_tracking), keyed by Shipment.carrier.
+# Example: {"DHL": {"adapter": "shipping.tracking.HttpJsonCarrierAdapter",
+#                   "base_url": "http://127.0.0.1:8765", "requests_per_second": 5}}
+CARRIER_TRACKING = {}
@@ -0,0 +1,13 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=shipglobal_backend.test_settings
+"""
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="shipglobal-test-media-")
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+ABUSE_CACHE = "default"
@@ -1,8 +1,12 @@
 from django.contrib import admin
-from shipping.models import Shipment
+from shipping.models import Shipment, ShipmentStatusEvent
 
 @admin.register(Shipment)
 class ShipmentAdmin(admin.ModelAdmin):
     list_display = ("user", "item_name", "product_value", "tracking_number", "shipping_price", "created_at")
     search_fields = ("user__username", "tracking_number")
 
+@admin.register(ShipmentStatusEvent)
+class ShipmentStatusEventAdmin(admin.ModelAdmin):
+    list_display = ("shipment", "from_status", "to_status", "source", "created_at")
+    list_filter = ("to_status", "source")
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessBroker:
+    """
+    Pub/sub for shipment events inside one server process. Publishers may be
+    sync code on any thread; subscribers are asyncio queues on the event
+    loop that created them. Only for single-process development: changes
+    made by run_worker or poll_tracking never reach it.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=100)
+        queue.loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            self._subscribers[user_id].discard(queue)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    def subscribed_users(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, user_id, event):
+        with self._lock:
+            queues = list(self._subscribers.get(user_id, ()))
+        for queue in queues:
+            queue.loop.call_soon_threadsafe(_offer, queue, event)
+
+
+class DatabaseBroker:
+    """
+    Reads events back from the ShipmentStatusEvent table, so a status change
+    made by any process (web, run_worker, poll_tracking) reaches streams
+    served by any other. publish() has nothing to do: log_status_changes
+    already wrote the row. Each server process polls once per POLL_SECONDS
+    for all of its subscribers and fans the rows out in memory.
+    """
+    reads_event_log = True
+    POLL_SECONDS = 1.0
+    # created_at is stamped before commit; look back this far for late rows
+    OVERLAP = timedelta(seconds=30)
+
+    def __init__(self):
+        self._local = InProcessBroker()
+        self._poller = None
+        self._delivered = {}  # event id -> created_at, pruned to OVERLAP
+        # Outlives any one request, so it can't borrow a request's sync thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shipment-events")
+
+    def subscribe(self, user_id):
+        queue = self._local.subscribe(user_id)
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._poller = loop.create_task(self._poll(timezone.now()))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        self._local.unsubscribe(user_id, queue)
+
+    def publish(self, user_id, event):
+        pass
+
+    async def _poll(self, started_at):
+        # Stops when the last subscriber leaves; the next subscribe restarts it
+        while self._local.subscribed_users():
+            try:
+                rows = await self._run(self._fetch, started_at, self._local.subscribed_users())
+            except Exception:
+                logger.exception("Polling shipment status events failed")
+                await self._run(connection.close)
+                rows = []
+            for event_id, user_id, event in rows:
+                self._local.publish(user_id, event)
+            await asyncio.sleep(self.POLL_SECONDS)
+
+    def _run(self, func, *args):
+        return sync_to_async(func, thread_sensitive=False, executor=self._executor)(*args)
+
+    def _fetch(self, started_at, user_ids):
+        from shipping.models import ShipmentStatusEvent
+
+        now = timezone.now()
+        cutoff = max(started_at, now - self.OVERLAP)
+        self._delivered = {pk: at for pk, at in self._delivered.items() if at >= cutoff}
+        rows = (ShipmentStatusEvent.objects
+                .filter(created_at__gte=cutoff, shipment__user_id__in=user_ids)
+                .exclude(id__in=list(self._delivered))
+                .order_by("id")
+                .values_list("id", "created_at", "shipment_id", "shipment__user_id", "from_status", "to_status"))
+        events = []
+        for event_id, created_at, shipment_id, user_id, from_status, to_status in rows:
+            self._delivered[event_id] = created_at
+            events.append((event_id, user_id, {
+                "shipment_id": shipment_id,
+                "from_status": from_status,
+                "to_status": to_status,
+            }))
+        return events
+
+
+def _offer(queue, event):
+    # A client that stopped reading loses events rather than growing memory
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "SHIPMENT_EVENT_BROKER", "shipping.events.DatabaseBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_status_changes(changes):
+    """Notify each shipment's owner once the surrounding transaction commits."""
+    from shipping.models import Shipment
+
+    if not changes or getattr(get_broker(), "reads_event_log", False):
+        return
+    owners = dict(Shipment.objects.filter(id__in=[c[0] for c in changes]).values_list("id", "user_id"))
+
+    def send():
+        broker = get_broker()
+        for shipment_id, from_status, to_status in changes:
+            if shipment_id in owners:
+                broker.publish(owners[shipment_id], {
+                    "shipment_id": shipment_id,
+                    "from_status": from_status,
+                    "to_status": to_status,
+                })
+
+    transaction.on_commit(send)
@@ -0,0 +1,310 @@
+"""
+Local stand-ins for the external services the backend talks to, for tests
+and offline load runs. Run one from the shell with:
+
+    python -m shipping.fakes carrier --port 8765
+    python -m shipping.fakes paypal --port 8766
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CARRIER_PROGRESSION = ["shipped", "in_transit", "out_for_delivery", "delivered"]
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out first, which is what latency tests provoke
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeServer:
+    """Runs a handler on a background thread; use as a context manager."""
+    handler_class = _JsonHandler
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), self.handler_class)
+        self.httpd.fake = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _CarrierHandler(_JsonHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/track":
+            return self.send_json({"detail": "Not found."}, status=404)
+        numbers = [n for n in parse_qs(url.query).get("numbers", [""])[0].split(",") if n]
+        self.send_json(*self.server.fake.advance(numbers))
+
+
+class FakeCarrierServer(FakeServer):
+    """
+    Speaks HttpJsonCarrierAdapter's protocol. Each time a tracking number is
+    polled it moves one step along CARRIER_PROGRESSION, unless a fixed status
+    was set in `statuses`. `latency` delays every answer and `fail_next`
+    makes the next N requests fail with a 503; `max_in_flight` and
+    `request_times` record how the poller behaved.
+    """
+    handler_class = _CarrierHandler
+
+    def __init__(self, statuses=None, latency=0, fail_next=0, **kwargs):
+        super().__init__(**kwargs)
+        self.statuses = dict(statuses or {})
+        self.latency = latency
+        self.fail_next = fail_next
+        self.polls = {}
+        self.requests = 0
+        self.request_times = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def advance(self, numbers):
+        with self._lock:
+            self.requests += 1
+            self.request_times.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return self._advance(numbers)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _advance(self, numbers):
+        with self._lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                return {"detail": "Fake outage."}, 503
+            result = {}
+            for number in numbers:
+                if number in self.statuses:
+                    result[number] = self.statuses[number]
+                    continue
+                step = self.polls.get(number, 0)
+                result[number] = CARRIER_PROGRESSION[min(step, len(CARRIER_PROGRESSION) - 1)]
+                self.polls[number] = step + 1
+            return result, 200
+
+
+# Smallest document PDF readers accept; enough for label round-trips
+FAKE_LABEL_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 288 432]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+class _ShipGlobalHandler(_JsonHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self.send_json({"detail": "Invalid JSON."}, status=400)
+        self.send_json(*self.server.fake.create_label(payload))
+
+
+class FakeShipGlobalServer(FakeServer):
+    """
+    Stand-in for SHIPGLOBAL_SHIPMENT_URL: answers every POST with a label.
+    Payloads whose item_name is in `reject` get a 422 instead, those in
+    `malformed` a 200 whose label isn't base64, and the next `fail_next`
+    requests a 503.
+    """
+    handler_class = _ShipGlobalHandler
+
+    def __init__(self, reject=(), malformed=(), fail_next=0, **kwargs):
+        super().__init__(**kwargs)
+        self.reject = set(reject)
+        self.malformed = set(malformed)
+        self.fail_next = fail_next
+        self.received = []
+        self._lock = threading.Lock()
+
+    def create_label(self, payload):
+        with self._lock:
+            self.received.append(payload)
+            count = len(self.received)
+            if self.fail_next:
+                self.fail_next -= 1
+                return {"detail": "Fake outage."}, 503
+        if payload.get("item_name") in self.reject:
+            return {"detail": "Shipment rejected."}, 422
+        if payload.get("item_name") in self.malformed:
+            return {"reference": payload.get("reference"), "label_pdf": "<not base64>"}, 200
+        return {
+            "reference": payload.get("reference"),
+            "carrier": "ShipGlobal",
+            "tracking_number": f"SG{count:08d}",
+            "label_pdf": base64.b64encode(FAKE_LABEL_PDF).decode(),
+        }, 200
+
+
+class _PayPalHandler(_JsonHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(body or b"{}")
+        return parse_qs(body.decode())
+
+    def _dispatch(self, method):
+        fake = self.server.fake
+        path = urlparse(self.path).path.rstrip("/")
+        body = self._read_body() if method == "POST" else {}
+        self.send_json(*fake.handle(method, path, body, self.headers))
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+class FakePayPalServer(FakeServer):
+    """
+    The slice of PayPal's v1 REST API that authentication.paypal_gateway uses:
+    OAuth tokens, create/find/execute payment. Payments are approved as soon
+    as they are created. `latency` (seconds) delays every answer, and
+    `fail_next` makes the next N requests fail with a 503, for breaker tests.
+    """
+    handler_class = _PayPalHandler
+
+    def __init__(self, latency=0, fail_next=0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.fail_next = fail_next
+        self.payments = {}
+        self.tokens = set()
+        self.requests = 0
+        self._executed_by = {}  # PayPal-Request-Id -> payment id
+        self._lock = threading.Lock()
+
+    def handle(self, method, path, body, headers):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self.fail_next:
+                self.fail_next -= 1
+                return {"name": "INTERNAL_SERVICE_ERROR", "message": "Fake outage."}, 503
+
+            if method == "POST" and path == "/v1/oauth2/token":
+                token = f"fake-{uuid.uuid4().hex}"
+                self.tokens.add(token)
+                return {"access_token": token, "token_type": "Bearer", "expires_in": 32400}, 200
+
+            if headers.get("Authorization", "").removeprefix("Bearer ") not in self.tokens:
+                return {"name": "AUTHENTICATION_FAILURE", "message": "Invalid token."}, 401
+
+            parts = path.split("/")[1:]  # v1, payments, payment, [id], [execute]
+            if parts[:3] != ["v1", "payments", "payment"]:
+                return {"name": "NOT_FOUND", "message": "Not found."}, 404
+            if method == "POST" and len(parts) == 3:
+                return self.create_payment(body), 201
+
+            payment = self.payments.get(parts[3]) if len(parts) > 3 else None
+            if payment is None:
+                return {"name": "INVALID_RESOURCE_ID", "message": "Payment not found."}, 404
+            if method == "GET" and len(parts) == 4:
+                return payment, 200
+            if method == "POST" and parts[4:] == ["execute"]:
+                return self.execute_payment(payment, body, headers.get("PayPal-Request-Id"))
+            return {"name": "NOT_FOUND", "message": "Not found."}, 404
+
+    def create_payment(self, body):
+        payment_id = f"PAYID-FAKE{len(self.payments) + 1:06d}"
+        payment = {
+            "id": payment_id,
+            "intent": body.get("intent", "sale"),
+            "state": "created",
+            "transactions": body.get("transactions", []),
+            "links": [
+                {"rel": "self", "href": f"{self.url}/v1/payments/payment/{payment_id}", "method": "GET"},
+                {"rel": "approval_url", "href": f"{self.url}/checkoutnow?token={payment_id}", "method": "REDIRECT"},
+                {"rel": "execute", "href": f"{self.url}/v1/payments/payment/{payment_id}/execute", "method": "POST"},
+            ],
+        }
+        self.payments[payment_id] = payment
+        return payment
+
+    def execute_payment(self, payment, body, request_id):
+        if request_id and self._executed_by.get(request_id) == payment["id"]:
+            return payment, 200  # same PayPal-Request-Id: replay, like PayPal does
+        if payment["state"] != "created":
+            return {"name": "PAYMENT_ALREADY_DONE", "message": "Payment has been done already."}, 400
+        if not body.get("payer_id"):
+            return {"name": "VALIDATION_ERROR", "message": "payer_id is required."}, 400
+        payment["state"] = "approved"
+        payment["payer"] = {"payer_info": {"payer_id": body["payer_id"]}}
+        if request_id:
+            self._executed_by[request_id] = payment["id"]
+        return payment, 200
+
+
+SERVERS = {
+    "carrier": FakeCarrierServer,
+    "shipglobal": FakeShipGlobalServer,
+    "paypal": FakePayPalServer,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in server.")
+    parser.add_argument("service", choices=sorted(SERVERS))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = SERVERS[args.service](host=args.host, port=args.port)
+    print(f"Fake {args.service} listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
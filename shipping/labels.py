@@ -0,0 +1,144 @@
+import base64
+import binascii
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from shipping.models import Shipment
+from shipping.status import bulk_transition
+
+logger = logging.getLogger(__name__)
+
+
+class LabelError(Exception):
+    pass
+
+
+class ShipGlobalClient:
+    """
+    Keep-alive HTTP client for the ShipGlobal shipment API. One instance is
+    shared by all worker threads; requests' connection pool is thread-safe.
+    """
+
+    def __init__(self, url=None, live_mode=None, pool_size=10, timeout=None, retries=3):
+        self.url = url or settings.SHIPGLOBAL_SHIPMENT_URL
+        self.live_mode = settings.SHIPGLOBAL_LIVE_MODE if live_mode is None else live_mode
+        self.timeout = timeout or getattr(settings, "SHIPGLOBAL_TIMEOUT", (5, 30))
+
+        # Only retry failed connects, where nothing reached the API. A POST that
+        # timed out or got a 5xx may still have bought a label, and we don't
+        # know that the API de-duplicates by shipment reference.
+        retry = Retry(total=retries, connect=retries, read=0, status=0, other=0, backoff_factor=0.5)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def create_label(self, payload):
+        """
+        Submit one shipment. Returns (pdf_bytes, carrier, tracking_number);
+        raises LabelError if the API refuses it.
+        """
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise LabelError(f"Request failed: {e}")
+        if response.status_code >= 400:
+            raise LabelError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+        if response.headers.get("Content-Type", "").startswith("application/pdf"):
+            return response.content, None, None
+        try:
+            data = response.json()
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object.")
+            if not data.get("label_pdf"):
+                raise LabelError(data.get("detail") or "No label in response.")
+            return base64.b64decode(data["label_pdf"], validate=True), data.get("carrier"), data.get("tracking_number")
+        except (ValueError, KeyError, binascii.Error) as e:
+            raise LabelError(f"Malformed response: {e}")
+
+    def close(self):
+        self.session.close()
+
+
+def shipment_payload(shipment, live_mode):
+    return {
+        "reference": f"shipment-{shipment.id}",
+        "live_mode": live_mode,
+        "item_name": shipment.item_name,
+        "declared_value": str(shipment.product_value),
+        "weight_kg": str(shipment.weight_kg) if shipment.weight_kg is not None else shipment.weight,
+        "dimensions_cm": shipment.dimension,
+        "recipient": {
+            "name": f"{shipment.user.first_name} {shipment.user.last_name}".strip() or shipment.user.username,
+            "email": shipment.user.email,
+            "phone": shipment.user.phone_number,
+        },
+    }
+
+
+def generate_labels(shipment_ids=None, max_workers=8, client=None):
+    """
+    Fetch labels for undelivered shipments without one, `max_workers`
+    requests at a time, and store the PDFs. Pending shipments move to
+    label_generated; checkout's in_transit ones keep their status.
+    Returns {"created": n, "errors": {shipment_id: message}}.
+    """
+    shipments = (Shipment.objects.select_related("user")
+                 .filter(label_pdf="").exclude(status__in=["delivered", "cancelled"]))
+    if shipment_ids:
+        shipments = shipments.filter(id__in=shipment_ids)
+    shipments = list(shipments)
+    if not shipments:
+        return {"created": 0, "errors": {}}
+
+    own_client = client is None
+    client = client or ShipGlobalClient(pool_size=max_workers)
+
+    def submit(shipment):
+        try:
+            return shipment, client.create_label(shipment_payload(shipment, client.live_mode)), None
+        except LabelError as e:
+            return shipment, None, str(e)
+
+    labelled = []
+    errors = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Network calls run in the pool; storage and DB writes stay on this thread
+            for shipment, result, error in pool.map(submit, shipments):
+                if not error:
+                    pdf, carrier, tracking_number = result
+                    try:
+                        shipment.label_pdf.save(f"label_{shipment.id}.pdf", ContentFile(pdf), save=False)
+                    except OSError as e:
+                        error = f"Could not store label: {e}"
+                if error:
+                    errors[shipment.id] = error
+                    logger.warning("Label for shipment #%s failed: %s", shipment.id, error)
+                    continue
+                if carrier:
+                    shipment.carrier = carrier
+                if tracking_number:
+                    shipment.tracking_number = tracking_number
+                labelled.append(shipment)
+    finally:
+        if own_client:
+            client.close()
+        # Labels already bought are recorded even if the batch stopped early
+        if labelled:
+            # bulk_update() skips auto_now; the changes feed orders on updated_at
+            now = timezone.now()
+            for shipment in labelled:
+                shipment.updated_at = now
+            Shipment.objects.bulk_update(
+                labelled, ["label_pdf", "carrier", "tracking_number", "updated_at"], batch_size=500
+            )
+            bulk_transition(Shipment.objects.filter(id__in=[s.id for s in labelled], status="pending"),
+                            "label_generated", source="label")
+    return {"created": len(labelled), "errors": errors}
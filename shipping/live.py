@@ -0,0 +1,88 @@
+import asyncio
+import json
+import secrets
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
+from shipping.events import get_broker
+
+KEEPALIVE_SECONDS = 15
+TICKET_SALT = "shipping.live.ticket"
+
+
+def issue_stream_ticket(user):
+    """
+    A signed, single-use ticket for opening one event stream. EventSource
+    cannot send an Authorization header, and a JWT in the query string ends
+    up in access logs; a ticket there is useless a few seconds later.
+    """
+    return signing.dumps({"user_id": user.id, "nonce": secrets.token_urlsafe(12)}, salt=TICKET_SALT)
+
+
+def _user_for_ticket(ticket):
+    max_age = settings.STREAM_TICKET_SECONDS
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=max_age)
+    except signing.BadSignature:  # includes SignatureExpired
+        return None
+    # cache.add() only succeeds the first time, so a ticket can't be replayed
+    if not cache.add(f"stream-ticket:{data['nonce']}", True, timeout=max_age):
+        return None
+    return get_user_model().objects.filter(id=data["user_id"], is_active=True).first()
+
+
+def _authenticate(request):
+    ticket = request.GET.get("ticket")
+    if ticket:
+        return _user_for_ticket(ticket)
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    return auth.get_user(auth.get_validated_token(raw_token))
+
+
+async def shipment_status_stream(request):
+    """
+    Server-Sent Events stream of the logged-in user's shipment status
+    changes. Authenticate with an Authorization header or with
+    ?ticket= from POST shipments/live/ticket/.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI an endless stream would pin a sync worker until it times out
+        return JsonResponse({"detail": "Live updates are only served by the ASGI app."}, status=503)
+
+    try:
+        user = await sync_to_async(_authenticate)(request)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        user = None
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+    broker = get_broker()
+    queue = broker.subscribe(user.id)
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(user.id, queue)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from shipping.labels import generate_labels
+
+
+class Command(BaseCommand):
+    help = "Request shipping labels from the ShipGlobal API for undelivered shipments without one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", type=int, nargs="*", help="Only these shipment ids.")
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent label requests.")
+
+    def handle(self, *args, **options):
+        summary = generate_labels(shipment_ids=options["ids"], max_workers=options["workers"])
+        for shipment_id, error in summary["errors"].items():
+            self.stderr.write(f"#{shipment_id}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['created']} label(s) created, {len(summary['errors'])} failed."
+        ))
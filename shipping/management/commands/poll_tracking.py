@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from shipping.tracking import load_adapters, poll_tracking
+
+
+class Command(BaseCommand):
+    help = "Poll carriers for active shipments and apply status changes in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Seconds between polls; 0 polls once and exits.")
+
+    def handle(self, *args, **options):
+        adapters = load_adapters()
+        if not adapters:
+            self.stdout.write(self.style.WARNING("No carriers configured in CARRIER_TRACKING."))
+            return
+
+        while True:
+            summary = poll_tracking(adapters)
+            self.stdout.write(
+                f"Polled {summary['polled']} tracking number(s): {summary['updated']} updated, "
+                f"{summary['rejected']} rejected by the state machine."
+            )
+            for error in summary["errors"]:
+                self.stderr.write(error)
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
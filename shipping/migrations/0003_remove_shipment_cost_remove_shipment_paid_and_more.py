@@ -0,0 +1,79 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0002_shipment_paid_alter_shipment_tracking_number'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='shipment',
+            name='cost',
+        ),
+        migrations.RemoveField(
+            model_name='shipment',
+            name='paid',
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='carrier',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='carrier_tracking_url',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='dimension',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='shipment_images/'),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='invoice_pdf',
+            field=models.FileField(default='', upload_to='invoices/'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='item_name',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='product_value',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='shipping_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='weight',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('label_generated', 'Label Generated'), ('shipped', 'Shipped'), ('in_transit', 'In Transit'), ('out_for_delivery', 'Out for Delivery'), ('delivered', 'Delivered'), ('exception', 'Exception'), ('cancelled', 'Cancelled')], default='pending', max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='tracking_number',
+            field=models.CharField(max_length=50),
+        ),
+    ]
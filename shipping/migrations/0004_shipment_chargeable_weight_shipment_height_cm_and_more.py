@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0003_remove_shipment_cost_remove_shipment_paid_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='chargeable_weight',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=3, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='height_cm',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='length_cm',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='weight_kg',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='width_cm',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0004_shipment_chargeable_weight_shipment_height_cm_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='shipping_sh_user_id_c74d9f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['-created_at', '-id'], name='shipping_sh_created_9cfab4_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0005_shipment_shipping_sh_user_id_c74d9f_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipmentStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=30)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending'), ('label_generated', 'Label Generated'), ('shipped', 'Shipped'), ('in_transit', 'In Transit'), ('out_for_delivery', 'Out for Delivery'), ('delivered', 'Delivered'), ('exception', 'Exception'), ('cancelled', 'Cancelled')], max_length=30)),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='shipping_sh_user_id_571d08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['updated_at', 'id'], name='shipping_sh_updated_7f92be_idx'),
+        ),
+        migrations.AddField(
+            model_name='shipmentstatusevent',
+            name='shipment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='shipping.shipment'),
+        ),
+    ]
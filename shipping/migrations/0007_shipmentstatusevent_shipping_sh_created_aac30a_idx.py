@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0006_shipmentstatusevent_shipment_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipmentstatusevent',
+            index=models.Index(fields=['created_at'], name='shipping_sh_created_aac30a_idx'),
+        ),
+    ]
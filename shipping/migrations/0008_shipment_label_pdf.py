@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0007_shipmentstatusevent_shipping_sh_created_aac30a_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='label_pdf',
+            field=models.FileField(blank=True, upload_to='labels/'),
+        ),
+    ]
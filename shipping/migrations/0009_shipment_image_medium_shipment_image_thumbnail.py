@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0008_shipment_label_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='image_medium',
+            field=models.ImageField(blank=True, upload_to='derivatives/medium/'),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, upload_to='derivatives/thumbnails/'),
+        ),
+    ]
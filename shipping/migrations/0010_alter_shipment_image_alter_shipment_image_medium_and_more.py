@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0009_shipment_image_medium_shipment_image_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shipment',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='shipment_images/'),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='image_medium',
+            field=models.ImageField(blank=True, db_index=True, upload_to='derivatives/medium/'),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, db_index=True, upload_to='derivatives/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='invoice_pdf',
+            field=models.FileField(db_index=True, upload_to='invoices/'),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='label_pdf',
+            field=models.FileField(blank=True, db_index=True, upload_to='labels/'),
+        ),
+    ]
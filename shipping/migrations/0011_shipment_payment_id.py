@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0010_alter_shipment_image_alter_shipment_image_medium_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='payment_id',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from authentication.models import ParcelImageDerivatives, ParcelMeasurements
 
 User = get_user_model()
 
@@ -16,7 +17,22 @@ STATUS_CHOICES = [
     ("cancelled", "Cancelled"),
 ]
 
-class Shipment(models.Model):
+# Status -> statuses it may move to; delivered and cancelled are final
+ALLOWED_TRANSITIONS = {
+    "pending": {"label_generated", "shipped", "in_transit", "exception", "cancelled"},
+    "label_generated": {"shipped", "in_transit", "exception", "cancelled"},
+    "shipped": {"in_transit", "out_for_delivery", "delivered", "exception"},
+    "in_transit": {"out_for_delivery", "delivered", "exception"},
+    "out_for_delivery": {"in_transit", "delivered", "exception"},
+    "exception": {"in_transit", "out_for_delivery", "delivered", "cancelled"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+
+def can_transition(from_status, to_status):
+    return to_status in ALLOWED_TRANSITIONS.get(from_status, set())
+
+class Shipment(ParcelMeasurements, ParcelImageDerivatives):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default="pending")  # ✅ dynamic
     carrier = models.CharField(max_length=100, null=True, blank=True)  # ✅ like DHL, FedEx etc.
@@ -24,12 +40,56 @@ class Shipment(models.Model):
     item_name = models.CharField(max_length=100)
     product_value = models.DecimalField(max_digits=10, decimal_places=2)
     tracking_number = models.CharField(max_length=50)
-    image = models.ImageField(upload_to="shipment_images/", null=True, blank=True)  # ✅ new
+    image = models.ImageField(upload_to="shipment_images/", null=True, blank=True, db_index=True)  # ✅ new
     weight = models.CharField(max_length=100, null=True, blank=True)                # ✅ new
     dimension = models.CharField(max_length=100, null=True, blank=True)            # ✅ new
-    invoice_pdf = models.FileField(upload_to="invoices/")
+    invoice_pdf = models.FileField(upload_to="invoices/", db_index=True)
+    payment_id = models.CharField(max_length=100, blank=True, db_index=True)  # PayPal payment that created it
+    label_pdf = models.FileField(upload_to="labels/", blank=True, db_index=True)
     shipping_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # set explicitly by queryset.update() callers
+
+    class Meta:
+        indexes = [
+            # Keyset pagination: newest first, per user and across all users
+            models.Index(fields=["user", "-created_at", "-id"]),
+            models.Index(fields=["-created_at", "-id"]),
+            # "changes since" sync feed
+            models.Index(fields=["user", "updated_at", "id"]),
+            models.Index(fields=["updated_at", "id"]),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        from shipping.status import log_status_changes
+
+        old_status = getattr(self, "_loaded_status", None) if self.pk else ""
+        super().save(*args, **kwargs)
+        if old_status is not None and old_status != self.status:
+            log_status_changes([(self.pk, old_status, self.status)])
+        self._loaded_status = self.status
 
     def __str__(self):
         return f"{self.item_name} - {self.tracking_number}"
+
+
+class ShipmentStatusEvent(models.Model):
+    """One row per status change; from_status is blank for a new shipment."""
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name="status_events")
+    from_status = models.CharField(max_length=30, blank=True)
+    to_status = models.CharField(max_length=30, choices=STATUS_CHOICES)
+    source = models.CharField(max_length=50, blank=True)  # e.g. "admin", "bulk", "carrier"
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["created_at"])]  # polled by shipping.events.DatabaseBroker
+
+    def __str__(self):
+        return f"#{self.shipment_id}: {self.from_status or '-'} -> {self.to_status}"
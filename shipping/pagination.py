@@ -0,0 +1,179 @@
+import base64
+from datetime import datetime, timedelta
+from django.db.models import Q
+from shipping.models import Shipment
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# updated_at is stamped before the writing transaction commits, so a change can
+# become visible after the feed has moved past its timestamp. Each read goes
+# back this far and the cursor remembers which ids in the window were served.
+CHANGES_OVERLAP = timedelta(seconds=30)
+MAX_SEEN_IDS = 500  # beyond this the oldest are forgotten and may be re-sent
+
+# API field name -> Shipment column
+SHIPMENT_FIELDS = {
+    "id": "id",
+    "item_name": "item_name",
+    "product_value": "product_value",
+    "tracking_number": "tracking_number",
+    "shipping_price": "shipping_price",
+    "invoice_url": "invoice_pdf",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "image": "image",
+    "thumbnail": "image_thumbnail",
+    "image_medium": "image_medium",
+    "dimension": "dimension",
+    "weight": "weight",
+    "chargeable_weight": "chargeable_weight",
+    "status": "status",
+    "carrier": "carrier",
+    "carrier_tracking_url": "carrier_tracking_url",
+}
+FILE_COLUMNS = {"invoice_pdf", "image", "image_thumbnail", "image_medium"}
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError("Invalid cursor.")
+
+
+def _requested_fields(request, default_fields):
+    fields = request.GET.get("fields")
+    if not fields:
+        return list(default_fields)
+    fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in default_fields]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(unknown)}.")
+    return fields
+
+
+def _page_size(request):
+    try:
+        page_size = int(request.GET.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise PaginationError("page_size must be an integer.")
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def paginate_shipments(request, queryset, default_fields):
+    """
+    List `queryset` newest first on (created_at, id), selecting only the
+    columns behind the requested `fields=`. Raises PaginationError on bad
+    query parameters.
+
+    Paging is opt-in so existing clients keep getting a bare list of every
+    row: with ?page_size= or ?cursor= the result is one keyset page,
+    {"results": [...], "next_cursor": ...}.
+    """
+    fields = _requested_fields(request, default_fields)
+    queryset = queryset.order_by("-created_at", "-id")
+    columns = {SHIPMENT_FIELDS[f] for f in fields} | {"id", "created_at"}
+    if "page_size" not in request.GET and "cursor" not in request.GET:
+        return _project(request, list(queryset.values(*columns)), fields)
+
+    page_size = _page_size(request)
+    cursor = request.GET.get("cursor")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    rows = list(queryset.values(*columns)[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    return {"results": _project(request, rows, fields), "next_cursor": next_cursor}
+
+
+def encode_changes_cursor(updated_at, pk, seen_ids):
+    raw = f"{updated_at.isoformat()}|{pk}|{','.join(map(str, seen_ids))}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_changes_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, pk, *seen = raw.split("|")
+        seen_ids = {int(i) for i in seen[0].split(",") if i} if seen else set()
+        return datetime.fromisoformat(updated_at), int(pk), seen_ids
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError("Invalid cursor.")
+
+
+def changes_since(request, queryset, default_fields):
+    """
+    Shipments changed after the `since=` cursor, oldest change first on
+    (updated_at, id). The returned cursor is what the client sends next
+    time; with no new changes it is the same cursor back.
+
+    Rows within CHANGES_OVERLAP of the cursor are re-read so late commits
+    are not skipped; ids the cursor says were already served are dropped.
+    Clients should still upsert by id, since a row can occasionally repeat.
+    """
+    fields = _requested_fields(request, default_fields)
+    page_size = _page_size(request)
+
+    queryset = queryset.order_by("updated_at", "id")
+    since = request.GET.get("since")
+    last, seen_ids = None, set()
+    if since:
+        updated_at, pk, seen_ids = decode_changes_cursor(since)
+        last = (updated_at, pk)
+        queryset = queryset.filter(updated_at__gte=updated_at - CHANGES_OVERLAP)
+
+    columns = {SHIPMENT_FIELDS[f] for f in fields} | {"id", "updated_at"}
+    rows, window = [], []  # window: (updated_at, id) of everything at or behind the new cursor
+    has_more = False
+    for row in queryset.values(*columns)[:page_size + len(seen_ids) + 1]:
+        key = (row["updated_at"], row["id"])
+        if last and key <= last and row["id"] in seen_ids:
+            window.append(key)  # already served, still inside the overlap
+            continue
+        if len(rows) == page_size:
+            has_more = True
+            break
+        rows.append(row)
+        window.append(key)
+
+    if not rows:
+        return {"results": [], "cursor": since, "has_more": False}
+
+    newest = max([(rows[-1]["updated_at"], rows[-1]["id"])] + ([last] if last else []))
+    recent = sorted(key for key in window if key[0] >= newest[0] - CHANGES_OVERLAP)
+    recent_ids = [pk for _, pk in recent[-MAX_SEEN_IDS:]]
+    cursor = encode_changes_cursor(newest[0], newest[1], recent_ids)
+
+    return {"results": _project(request, rows, fields), "cursor": cursor, "has_more": has_more}
+
+
+def _project(request, rows, fields):
+    results = []
+    for row in rows:
+        item = {}
+        for field in fields:
+            column = SHIPMENT_FIELDS[field]
+            value = row[column]
+            if column in FILE_COLUMNS:
+                storage = Shipment._meta.get_field(column).storage
+                value = request.build_absolute_uri(storage.url(value)) if value else None
+            item[field] = value
+        results.append(item)
+    return results
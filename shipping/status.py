@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.utils import timezone
+from shipping.events import publish_status_changes
+from shipping.models import Shipment, ShipmentStatusEvent, can_transition
+
+
+def log_status_changes(changes, source=""):
+    """
+    Write one ShipmentStatusEvent per (shipment_id, from_status, to_status)
+    and push the changes to the owners' live streams.
+    """
+    ShipmentStatusEvent.objects.bulk_create([
+        ShipmentStatusEvent(shipment_id=shipment_id, from_status=from_status, to_status=to_status, source=source)
+        for shipment_id, from_status, to_status in changes
+    ])
+    publish_status_changes(changes)
+
+
+def bulk_transition(queryset, new_status, source=""):
+    """
+    Move every shipment in `queryset` to `new_status` where the state machine
+    allows it, with one UPDATE. Returns {shipment_id: (outcome, from_status)}
+    where outcome is "updated", "unchanged" or "invalid_transition".
+    """
+    outcomes = {}
+    changes = []
+    with transaction.atomic():
+        rows = queryset.select_for_update().values_list("id", "status")
+        for shipment_id, status in rows:
+            if status == new_status:
+                outcomes[shipment_id] = ("unchanged", status)
+            elif can_transition(status, new_status):
+                outcomes[shipment_id] = ("updated", status)
+                changes.append((shipment_id, status, new_status))
+            else:
+                outcomes[shipment_id] = ("invalid_transition", status)
+
+        if changes:
+            # queryset.update() skips auto_now, so bump updated_at for the sync feed
+            Shipment.objects.filter(id__in=[c[0] for c in changes]).update(
+                status=new_status, updated_at=timezone.now()
+            )
+            log_status_changes(changes, source=source)
+    return outcomes
@@ -1,3 +1,301 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from shipping.fakes import FAKE_LABEL_PDF, FakeCarrierServer, FakeShipGlobalServer
+from shipping.labels import ShipGlobalClient, generate_labels
+from shipping.models import Shipment, ShipmentStatusEvent
+from shipping.tracking import HttpJsonCarrierAdapter, poll_tracking
+from shipping.views import ShipmentExportView
+
+User = get_user_model()
+
+
+class TrackingPollerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="poller", email="poller@example.com")
+
+    def make_shipments(self, count, status="label_generated"):
+        return [
+            Shipment.objects.create(
+                user=self.user, item_name=f"Parcel {i}", product_value=10,
+                tracking_number=f"TRK{i:04d}", carrier="FakeCarrier", status=status,
+            )
+            for i in range(count)
+        ]
+
+    def poll(self, server, **options):
+        options = {"batch_size": 1, "requests_per_second": 1000, "retry_backoff": 0.05, **options}
+        adapter = HttpJsonCarrierAdapter("FakeCarrier", base_url=server.url, timeout=5, **options)
+        return poll_tracking({"fakecarrier": adapter})
+
+    def test_applies_reported_statuses_in_bulk(self):
+        shipments = self.make_shipments(3)
+        with FakeCarrierServer(statuses={"TRK0002": "exception"}) as server:
+            summary = self.poll(server, batch_size=50)
+
+        self.assertEqual(summary, {"polled": 3, "updated": 3, "rejected": 0, "errors": []})
+        self.assertEqual(server.requests, 1)
+        statuses = dict(Shipment.objects.values_list("id", "status"))
+        self.assertEqual(statuses[shipments[0].id], "shipped")
+        self.assertEqual(statuses[shipments[2].id], "exception")
+
+    def test_skips_final_statuses(self):
+        self.make_shipments(2, status="delivered")
+        with FakeCarrierServer() as server:
+            summary = self.poll(server)
+        self.assertEqual(summary["polled"], 0)
+        self.assertEqual(server.requests, 0)
+
+    def test_concurrency_is_bounded_per_carrier(self):
+        self.make_shipments(12)
+        with FakeCarrierServer(latency=0.1) as server:
+            summary = self.poll(server, max_concurrency=3)
+
+        self.assertEqual(summary["updated"], 12)
+        self.assertEqual(server.requests, 12)
+        self.assertLessEqual(server.max_in_flight, 3)
+        self.assertGreater(server.max_in_flight, 1)
+
+    def test_rate_limit_spaces_requests(self):
+        self.make_shipments(5)
+        with FakeCarrierServer() as server:
+            self.poll(server, max_concurrency=5, requests_per_second=20)
+
+        gaps = [b - a for a, b in zip(server.request_times, server.request_times[1:])]
+        self.assertEqual(len(gaps), 4)
+        self.assertGreaterEqual(min(gaps), 0.04)
+
+    def test_retries_transient_errors_with_backoff(self):
+        shipment, = self.make_shipments(1)
+        with FakeCarrierServer(fail_next=2) as server:
+            summary = self.poll(server, max_retries=2)
+
+        self.assertEqual(summary["errors"], [])
+        self.assertEqual(server.requests, 3)
+        first, second, third = server.request_times
+        self.assertGreaterEqual(second - first, 0.05)
+        self.assertGreaterEqual(third - second, 0.1)  # doubled
+        shipment.refresh_from_db()
+        self.assertEqual(shipment.status, "shipped")
+
+    def test_gives_up_after_max_retries(self):
+        shipment, = self.make_shipments(1)
+        with FakeCarrierServer(fail_next=5) as server:
+            summary = self.poll(server, max_retries=1)
+
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(len(summary["errors"]), 1)
+        self.assertIn("503", summary["errors"][0])
+        shipment.refresh_from_db()
+        self.assertEqual(shipment.status, "label_generated")
+
+
+class LabelBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="labels", email="labels@example.com")
+
+    def make_shipment(self, item_name, status="in_transit"):
+        return Shipment.objects.create(
+            user=self.user, item_name=item_name, product_value=25, tracking_number="", status=status,
+        )
+
+    def generate(self, server, **kwargs):
+        return generate_labels(client=ShipGlobalClient(url=server.url, live_mode=False), max_workers=4, **kwargs)
+
+    def test_partial_failure_keeps_the_labels_that_were_bought(self):
+        checkout = self.make_shipment("Checkout parcel")
+        pending = self.make_shipment("Pending parcel", status="pending")
+        rejected = self.make_shipment("Rejected parcel")
+        malformed = self.make_shipment("Malformed parcel")
+
+        with FakeShipGlobalServer(reject={"Rejected parcel"}, malformed={"Malformed parcel"}) as server:
+            summary = self.generate(server)
+
+        self.assertEqual(summary["created"], 2)
+        self.assertEqual(set(summary["errors"]), {rejected.id, malformed.id})
+        self.assertIn("422", summary["errors"][rejected.id])
+        self.assertIn("Malformed response", summary["errors"][malformed.id])
+
+        for shipment in (checkout, pending):
+            shipment.refresh_from_db()
+            self.assertTrue(shipment.label_pdf)
+            self.assertTrue(shipment.tracking_number.startswith("SG"))
+            with shipment.label_pdf.open("rb") as f:
+                self.assertEqual(f.read(), FAKE_LABEL_PDF)
+        self.assertEqual(checkout.status, "in_transit")
+        self.assertEqual(pending.status, "label_generated")
+
+        for shipment in (rejected, malformed):
+            shipment.refresh_from_db()
+            self.assertFalse(shipment.label_pdf)
+            self.assertEqual(shipment.status, "in_transit")
+
+    def test_new_tracking_numbers_reach_the_changes_feed(self):
+        shipment = self.make_shipment("Checkout parcel")
+        client = APIClient()
+        client.force_authenticate(self.user)
+        cursor = client.get(reverse("shipment-changes")).data["cursor"]
+
+        with FakeShipGlobalServer() as server:
+            self.generate(server)
+
+        page = client.get(reverse("shipment-changes"), {"since": cursor}).data
+        self.assertEqual([row["id"] for row in page["results"]], [shipment.id])
+        self.assertTrue(page["results"][0]["tracking_number"].startswith("SG"))
+
+    def test_second_run_only_requests_missing_labels(self):
+        self.make_shipment("First")
+        with FakeShipGlobalServer() as server:
+            self.generate(server)
+            self.make_shipment("Second")
+            summary = self.generate(server)
+
+        self.assertEqual(summary, {"created": 1, "errors": {}})
+        self.assertEqual([p["item_name"] for p in server.received], ["First", "Second"])
+
+    def test_skips_delivered_and_cancelled(self):
+        self.make_shipment("Delivered", status="delivered")
+        self.make_shipment("Cancelled", status="cancelled")
+        with FakeShipGlobalServer() as server:
+            summary = self.generate(server)
+        self.assertEqual(summary, {"created": 0, "errors": {}})
+        self.assertEqual(server.received, [])
+
+    def test_post_is_not_retried_after_a_server_error(self):
+        shipment = self.make_shipment("Parcel")
+        with FakeShipGlobalServer(fail_next=1) as server:
+            summary = self.generate(server)
+
+        self.assertEqual(len(server.received), 1)
+        self.assertIn("503", summary["errors"][shipment.id])
+
+
+class BulkStatusTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="dispatcher", email="dispatcher@example.com", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_shipment(self, status, tracking_number=""):
+        return Shipment.objects.create(
+            user=self.admin, item_name="Parcel", product_value=10, tracking_number=tracking_number, status=status,
+        )
+
+    def bulk_status(self, status, **keys):
+        return self.client.post(reverse("shipment-bulk-status"), {"status": status, **keys}, format="json")
+
+    def test_final_and_skipped_states_are_rejected_per_row(self):
+        pending = self.make_shipment("pending")
+        delivered = self.make_shipment("delivered")
+        cancelled = self.make_shipment("cancelled")
+        shipped = self.make_shipment("shipped")
+
+        response = self.bulk_status("label_generated", ids=[pending.id, delivered.id, cancelled.id, shipped.id])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(
+            [(row["id"], row["outcome"], row["from_status"]) for row in response.data["results"]],
+            [
+                (pending.id, "updated", "pending"),
+                (delivered.id, "invalid_transition", "delivered"),
+                (cancelled.id, "invalid_transition", "cancelled"),
+                (shipped.id, "invalid_transition", "shipped"),  # can't go back
+            ],
+        )
+        self.assertEqual(
+            dict(Shipment.objects.values_list("id", "status")),
+            {pending.id: "label_generated", delivered.id: "delivered",
+             cancelled.id: "cancelled", shipped.id: "shipped"},
+        )
+        self.assertEqual(
+            list(ShipmentStatusEvent.objects.filter(source="bulk").values_list("shipment_id", "from_status", "to_status")),
+            [(pending.id, "pending", "label_generated")],
+        )
+
+    def test_same_status_and_unknown_keys_are_reported(self):
+        in_transit = self.make_shipment("in_transit", tracking_number="TRK1")
+        response = self.bulk_status("in_transit", tracking_numbers=["TRK1", "MISSING"])
+        self.assertEqual(
+            [row["outcome"] for row in response.data["results"]], ["unchanged", "not_found"],
+        )
+        self.assertEqual(response.data["results"][0]["id"], in_transit.id)
+        self.assertFalse(ShipmentStatusEvent.objects.filter(source="bulk").exists())
+
+    def test_bad_requests_are_rejected_before_touching_rows(self):
+        shipment = self.make_shipment("pending")
+        self.assertEqual(self.bulk_status("lost", ids=[shipment.id]).status_code, 400)
+        self.assertEqual(self.bulk_status("shipped", ids=[shipment.id], tracking_numbers=["TRK1"]).status_code, 400)
+        self.assertEqual(self.bulk_status("shipped", ids=shipment.id).status_code, 400)
+        shipment.refresh_from_db()
+        self.assertEqual(shipment.status, "pending")
+
+    def test_customers_cannot_bulk_update(self):
+        shipment = self.make_shipment("pending")
+        self.client.force_authenticate(User.objects.create(username="customer", email="customer@example.com"))
+        self.assertEqual(self.bulk_status("cancelled", ids=[shipment.id]).status_code, 403)
+
+
+class ShipmentListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="lister", email="lister@example.com")
+        self.ids = [
+            Shipment.objects.create(user=self.user, item_name=f"Parcel {i}", product_value=10, tracking_number="").id
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_without_paging_params_returns_every_row_as_a_list(self):
+        response = self.client.get(reverse("shipment-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual([row["id"] for row in response.data], self.ids[::-1])
+
+    def test_page_size_opts_into_keyset_pages(self):
+        url = reverse("shipment-list")
+        first = self.client.get(url, {"page_size": 2, "fields": "id,status"}).data
+        self.assertEqual([row["id"] for row in first["results"]], self.ids[:2:-1])
+        self.assertEqual(set(first["results"][0]), {"id", "status"})
+
+        seen = [row["id"] for row in first["results"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = self.client.get(url, {"cursor": cursor, "page_size": 2}).data
+            seen += [row["id"] for row in page["results"]]
+            cursor = page["next_cursor"]
+        self.assertEqual(seen, self.ids[::-1])
+
+    def test_bad_cursor_is_rejected(self):
+        self.assertEqual(self.client.get(reverse("shipment-list"), {"cursor": "nope"}).status_code, 400)
+
+
+@mock.patch.object(ShipmentExportView, "CHUNK_SIZE", 2)
+class ShipmentExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="exporter", email="exporter@example.com", is_staff=True)
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.admin)}"}
+        for i in range(5):
+            Shipment.objects.create(user=self.admin, item_name=f"Parcel {i}", product_value=10, tracking_number="")
+
+    async def test_streams_chunks_asynchronously_under_asgi(self):
+        response = await AsyncClient().get(reverse("shipment-export", args=["ndjson"]), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        # A sync iterator would be read into memory by the ASGI handler
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        self.assertEqual([row["item_name"] for row in rows], [f"Parcel {i}" for i in range(5)])
+        self.assertEqual(len(chunks), 3)  # 2 + 2 + 1 rows
+
+    def test_csv_under_wsgi(self):
+        response = self.client.get(reverse("shipment-export", args=["csv"]), headers=self.headers)
+        self.assertFalse(response.is_async)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "user_id", "username"])
+        self.assertEqual(len(lines), 6)
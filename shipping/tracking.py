@@ -0,0 +1,170 @@
+import asyncio
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from django.conf import settings
+from django.utils.module_loading import import_string
+from shipping.models import Shipment, STATUS_CHOICES
+from shipping.status import bulk_transition
+
+FINAL_STATUSES = ("delivered", "cancelled")
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across coroutines."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CarrierAdapter:
+    """
+    Talks to one carrier. Subclasses implement fetch_statuses(); the poller
+    handles batching, concurrency and rate limiting from these settings.
+    """
+    batch_size = 50
+    max_concurrency = 4
+    requests_per_second = 5
+    max_retries = 2
+    retry_backoff = 1.0  # seconds before the first retry, doubled after each
+
+    def __init__(self, name, **options):
+        self.name = name
+        for key in ("batch_size", "max_concurrency", "requests_per_second", "max_retries", "retry_backoff"):
+            if key in options:
+                setattr(self, key, options.pop(key))
+        self.options = options
+
+    async def fetch_statuses(self, tracking_numbers):
+        """Return {tracking_number: status} for the numbers the carrier knows."""
+        raise NotImplementedError
+
+    def should_retry(self, error):
+        """Network trouble, throttling and 5xx are worth another try; other errors aren't."""
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code == 429 or error.code >= 500
+        return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+class HttpJsonCarrierAdapter(CarrierAdapter):
+    """
+    GET {base_url}/track?numbers=A,B -> {"A": "in_transit", ...}. This is
+    what shipping.fakes.FakeCarrierServer speaks.
+    """
+
+    async def fetch_statuses(self, tracking_numbers):
+        return await asyncio.to_thread(self._fetch, tracking_numbers)
+
+    def _fetch(self, tracking_numbers):
+        query = urllib.parse.urlencode({"numbers": ",".join(tracking_numbers)})
+        url = f"{self.options['base_url'].rstrip('/')}/track?{query}"
+        with urllib.request.urlopen(url, timeout=self.options.get("timeout", 10)) as response:
+            return json.load(response)
+
+
+def load_adapters():
+    """
+    Build adapters from settings.CARRIER_TRACKING, keyed by lower-cased
+    carrier name as stored on Shipment.carrier.
+    """
+    adapters = {}
+    for name, config in getattr(settings, "CARRIER_TRACKING", {}).items():
+        config = dict(config)
+        adapter_class = import_string(config.pop("adapter", "shipping.tracking.HttpJsonCarrierAdapter"))
+        adapters[name.lower()] = adapter_class(name, **config)
+    return adapters
+
+
+async def _poll_carrier(adapter, tracking_numbers, errors):
+    semaphore = asyncio.Semaphore(adapter.max_concurrency)
+    limiter = RateLimiter(adapter.requests_per_second)
+    results = {}
+
+    async def fetch(batch):
+        async with semaphore:
+            for attempt in range(adapter.max_retries + 1):
+                await limiter.wait()
+                try:
+                    results.update(await adapter.fetch_statuses(batch))
+                    return
+                except Exception as e:
+                    if attempt == adapter.max_retries or not adapter.should_retry(e):
+                        errors.append(f"{adapter.name}: {e!r}")
+                        return
+                # Backing off while holding the slot also eases the load on the carrier
+                await asyncio.sleep(adapter.retry_backoff * 2 ** attempt)
+
+    batches = [tracking_numbers[i:i + adapter.batch_size]
+               for i in range(0, len(tracking_numbers), adapter.batch_size)]
+    await asyncio.gather(*(fetch(batch) for batch in batches))
+    return results
+
+
+async def _poll_all(adapters, numbers_by_carrier, errors):
+    carriers = list(numbers_by_carrier)
+    statuses = await asyncio.gather(*(
+        _poll_carrier(adapters[carrier], numbers_by_carrier[carrier], errors) for carrier in carriers
+    ))
+    return dict(zip(carriers, statuses))
+
+
+def poll_tracking(adapters=None):
+    """
+    Ask every configured carrier about its active shipments and apply the
+    reported statuses through the shipment state machine, one bulk UPDATE
+    per target status. Returns a summary dict.
+    """
+    adapters = load_adapters() if adapters is None else adapters
+    shipments = (Shipment.objects
+                 .exclude(status__in=FINAL_STATUSES)
+                 .exclude(carrier__isnull=True).exclude(tracking_number="")
+                 .values_list("id", "carrier", "tracking_number", "status"))
+
+    numbers_by_carrier = defaultdict(list)
+    shipments_by_key = defaultdict(list)
+    for shipment_id, carrier, tracking_number, status in shipments.iterator():
+        carrier = carrier.lower()
+        if carrier in adapters:
+            if not shipments_by_key[(carrier, tracking_number)]:
+                numbers_by_carrier[carrier].append(tracking_number)
+            shipments_by_key[(carrier, tracking_number)].append((shipment_id, status))
+
+    errors = []
+    reported = asyncio.run(_poll_all(adapters, numbers_by_carrier, errors)) if numbers_by_carrier else {}
+
+    valid_statuses = dict(STATUS_CHOICES)
+    targets = defaultdict(list)
+    for carrier, statuses in reported.items():
+        for tracking_number, new_status in statuses.items():
+            if new_status not in valid_statuses:
+                continue
+            for shipment_id, status in shipments_by_key.get((carrier, tracking_number), ()):
+                if status != new_status:
+                    targets[new_status].append(shipment_id)
+
+    updated = 0
+    rejected = 0
+    for new_status, shipment_ids in targets.items():
+        outcomes = bulk_transition(Shipment.objects.filter(id__in=shipment_ids), new_status, source="carrier")
+        updated += sum(1 for outcome, _ in outcomes.values() if outcome == "updated")
+        rejected += sum(1 for outcome, _ in outcomes.values() if outcome == "invalid_transition")
+
+    return {
+        "polled": sum(len(v) for v in numbers_by_carrier.values()),
+        "updated": updated,
+        "rejected": rejected,
+        "errors": errors,
+    }
@@ -1,7 +1,13 @@
 from django.urls import path
 from . import views  # ya jo bhi correct import ho
+from . import live
 
 urlpatterns = [
     # Example path
     path("shipments/", views.ShipmentListView.as_view(), name="shipment-list"),
+    path("shipments/live/", live.shipment_status_stream, name="shipment-live"),
+    path("shipments/live/ticket/", views.ShipmentStreamTicketView.as_view(), name="shipment-live-ticket"),
+    path("shipments/changes/", views.ShipmentChangesView.as_view(), name="shipment-changes"),
+    path("shipments/bulk-status/", views.BulkShipmentStatusView.as_view(), name="shipment-bulk-status"),
+    path("shipments/export/<str:export_format>/", views.ShipmentExportView.as_view(), name="shipment-export"),
 ]
@@ -1,5 +1,17 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.response import Response
-from shipping.models import Shipment
+from shipping.live import issue_stream_ticket
+from shipping.models import Shipment, STATUS_CHOICES
+from shipping.status import bulk_transition
+from shipping.pagination import paginate_shipments, changes_since, PaginationError
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
@@ -30,6 +42,10 @@ class UpdateShipmentStatusView(APIView):
 
 class ShipmentListView(APIView):
     permission_classes = [IsAuthenticated]
+    FIELDS = [
+        "id", "item_name", "product_value", "tracking_number", "shipping_price", "invoice_url", "created_at",
+        "image", "thumbnail", "dimension", "weight", "status", "carrier", "carrier_tracking_url",
+    ]
 
     def get(self, request):
         if request.user.is_superuser:
@@ -37,22 +53,181 @@ class ShipmentListView(APIView):
         else:
             shipments = Shipment.objects.filter(user=request.user)
 
-        data = [{
-            "id":s.id,
-            "item_name": s.item_name,
-            "product_value": s.product_value,
-            "tracking_number": s.tracking_number,
-            "shipping_price": s.shipping_price,
-            "invoice_url": request.build_absolute_uri(s.invoice_pdf.url) if s.invoice_pdf else None,
-            "created_at": s.created_at,
-            "image": request.build_absolute_uri(s.image.url) if s.image else None,
-            "dimension": s.dimension,
-            "weight": s.weight,
-            "status": s.status,
-            "carrier": s.carrier,
-            "carrier_tracking_url": s.carrier_tracking_url,
-        } for s in shipments]
-
-
-
-        return Response(data, status=200)
+        try:
+            page = paginate_shipments(request, shipments, self.FIELDS)
+        except PaginationError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response(page, status=200)
+
+
+class ShipmentChangesView(APIView):
+    permission_classes = [IsAuthenticated]
+    FIELDS = ShipmentListView.FIELDS + ["updated_at"]
+
+    def get(self, request):
+        if request.user.is_superuser:
+            shipments = Shipment.objects.all()
+        else:
+            shipments = Shipment.objects.filter(user=request.user)
+
+        try:
+            page = changes_since(request, shipments, self.FIELDS)
+        except PaginationError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return Response(page, status=200)
+
+
+class ShipmentStreamTicketView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            "ticket": issue_stream_ticket(request.user),
+            "expires_in": settings.STREAM_TICKET_SECONDS,
+        }, status=201)
+
+
+class BulkShipmentStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    MAX_ITEMS = 1000
+
+    def post(self, request):
+        new_status = request.data.get("status")
+        ids = request.data.get("ids")
+        tracking_numbers = request.data.get("tracking_numbers")
+
+        if new_status not in dict(STATUS_CHOICES):
+            return Response({"detail": "Invalid status."}, status=400)
+        if bool(ids) == bool(tracking_numbers):
+            return Response({"detail": "Provide either ids or tracking_numbers."}, status=400)
+
+        keys = ids or tracking_numbers
+        if not isinstance(keys, list):
+            return Response({"detail": "ids / tracking_numbers must be a list."}, status=400)
+        if len(keys) > self.MAX_ITEMS:
+            return Response({"detail": f"At most {self.MAX_ITEMS} shipments per request."}, status=400)
+
+        if ids:
+            key_field = "id"
+            shipments = Shipment.objects.filter(id__in=[i for i in ids if str(i).isdigit()])
+        else:
+            key_field = "tracking_number"
+            shipments = Shipment.objects.filter(tracking_number__in=tracking_numbers)
+
+        matches = {}
+        for shipment_id, key in shipments.values_list("id", key_field):
+            matches.setdefault(str(key), []).append(shipment_id)
+
+        outcomes = bulk_transition(shipments, new_status, source="bulk")
+
+        results = []
+        for key in keys:
+            shipment_ids = matches.get(str(key))
+            if not shipment_ids:
+                results.append({key_field: key, "outcome": "not_found"})
+                continue
+            for shipment_id in shipment_ids:
+                if shipment_id not in outcomes:  # deleted since the lookup
+                    results.append({key_field: key, "id": shipment_id, "outcome": "not_found"})
+                    continue
+                outcome, from_status = outcomes[shipment_id]
+                results.append({key_field: key, "id": shipment_id, "outcome": outcome, "from_status": from_status})
+
+        return Response({
+            "status": new_status,
+            "updated": sum(1 for outcome, _ in outcomes.values() if outcome == "updated"),
+            "results": results,
+        }, status=200)
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+    def write(self, value):
+        return value
+
+
+class ShipmentExportView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    COLUMNS = [
+        "id", "user_id", "user__username", "item_name", "product_value", "tracking_number", "shipping_price",
+        "status", "carrier", "weight", "dimension", "chargeable_weight", "invoice_pdf", "created_at",
+    ]
+    CHUNK_SIZE = 2000
+
+    def get(self, request, export_format):
+        if export_format not in ("ndjson", "csv"):
+            return Response({"detail": "Format must be 'ndjson' or 'csv'."}, status=400)
+
+        shipments = Shipment.objects.all()
+
+        statuses = [s for s in request.GET.get("status", "").split(",") if s]
+        if statuses:
+            if not set(statuses) <= set(dict(STATUS_CHOICES)):
+                return Response({"detail": "Invalid status."}, status=400)
+            shipments = shipments.filter(status__in=statuses)
+
+        # Compare created_at against day boundaries rather than created_at__date,
+        # which wraps the column in DATE() and can't use its index
+        for param, lookup, offset in (("created_from", "created_at__gte", 0), ("created_to", "created_at__lt", 1)):
+            value = request.GET.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:  # well-formed but impossible, e.g. 2024-02-30
+                    day = None
+                if day is None:
+                    return Response({"detail": f"{param} must be a date (YYYY-MM-DD)."}, status=400)
+                start = datetime.combine(day + timedelta(days=offset), time.min)
+                shipments = shipments.filter(**{lookup: timezone.make_aware(start)})
+
+        header = ["username" if c == "user__username" else c for c in self.COLUMNS]
+        if export_format == "csv":
+            writer = csv.writer(_Echo())
+            encode = writer.writerow
+            head = writer.writerow(header)
+            content_type = "text/csv"
+        else:
+            def encode(row):
+                return json.dumps(dict(zip(header, row)), default=str) + "\n"
+            head = ""
+            content_type = "application/x-ndjson"
+
+        # Under ASGI a sync iterator is read to the end before the first byte
+        # is sent, so hand the ASGI handler an async one.
+        chunks = _aexport_chunks if isinstance(request._request, ASGIRequest) else _export_chunks
+        content = chunks(shipments, self.COLUMNS, self.CHUNK_SIZE, encode, head)
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="shipments.{export_format}"'
+        return response
+
+
+def _fetch_chunk(queryset, columns, after_id, size):
+    # Keyset page on the primary key (columns[0] is "id"): one short query per chunk
+    return list(queryset.filter(id__gt=after_id).order_by("id").values_list(*columns)[:size])
+
+
+def _export_chunks(queryset, columns, size, encode, head):
+    if head:
+        yield head
+    after_id = 0
+    while True:
+        rows = _fetch_chunk(queryset, columns, after_id, size)
+        if not rows:
+            return
+        yield "".join(encode(row) for row in rows)
+        after_id = rows[-1][0]
+
+
+async def _aexport_chunks(queryset, columns, size, encode, head):
+    if head:
+        yield head
+    after_id = 0
+    while True:
+        rows = await sync_to_async(_fetch_chunk)(queryset, columns, after_id, size)
+        if not rows:
+            return
+        yield "".join(encode(row) for row in rows)
+        after_id = rows[-1][0]